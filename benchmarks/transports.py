@@ -0,0 +1,79 @@
+"""Compare the MBTA client's transports on a parallel fan-out.
+
+Fetches the stops of every subway line at once, with each transport,
+and reports how long the fan-out took. Calls the live MBTA API, so set
+MBTA_API_KEY to avoid its anonymous rate limit.
+
+    python -m benchmarks.transports --rounds 5 --concurrency 8
+"""
+import argparse
+import statistics
+import time
+
+from gbpt_api import mbta
+
+
+def fetch_subway_stops(
+    transport: mbta.Transport, route_ids: list[str], concurrency: int
+) -> float:
+    """Fetch the stops of each line in parallel, returning the seconds
+    it took.
+    """
+    # Nothing is cached, so every round calls the API for every line.
+    client = mbta.Client(
+        response_cache=mbta.ResponseCache(max_entries=0),
+        transport=transport,
+    )
+
+    start = time.perf_counter()
+    mbta.fan_out(
+        [
+            lambda route_id=route_id: client.list_stops(route_ids=route_id)
+            for route_id in route_ids
+        ],
+        max_concurrency=concurrency,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    route_ids = [
+        route.id
+        for route in mbta.Client().list_routes(
+            type=[mbta.RouteType.LIGHT_RAIL, mbta.RouteType.HEAVY_RAIL]
+        )
+    ]
+    print(
+        f"Fetching the stops of {len(route_ids)} lines, "
+        f"{args.concurrency} at a time, {args.rounds} times.\n"
+    )
+
+    for name in mbta.transport.TRANSPORTS:
+        try:
+            transport = mbta.transport.create(name)
+        except ImportError as e:
+            print(f"{name:>10}: skipped, {e}")
+            continue
+
+        # The first round opens the connections; leave it out.
+        fetch_subway_stops(transport, route_ids, args.concurrency)
+        durations = [
+            fetch_subway_stops(transport, route_ids, args.concurrency)
+            for _ in range(args.rounds)
+        ]
+        transport.close()
+
+        print(
+            f"{name:>10}: median {statistics.median(durations) * 1000:.0f}ms, "
+            f"min {min(durations) * 1000:.0f}ms, "
+            f"max {max(durations) * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
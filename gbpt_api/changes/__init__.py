@@ -0,0 +1,6 @@
+from .routes import router as changes_router
+
+
+def get_routers():
+    """Hook used by the app to find the routers."""
+    return [changes_router]
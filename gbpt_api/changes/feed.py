@@ -0,0 +1,236 @@
+import collections
+import hashlib
+import json
+import threading
+import time
+from typing import Callable
+
+from gbpt_api import mbta
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The kinds of records in the catalogue, each mapping IDs to records.
+KINDS = ("lines", "stops")
+
+Catalogue = dict[str, dict[str, dict]]
+
+
+class Changes:
+    """What was added, removed and modified between two catalogues."""
+
+    def __init__(self) -> None:
+        # Per kind, the net change to each record ID: either
+        # ("added", record), ("modified", record) or ("removed", None).
+        self._changes: dict[str, dict[str, tuple[str, dict | None]]] = {
+            kind: {} for kind in KINDS
+        }
+
+    @classmethod
+    def between(cls, old: Catalogue, new: Catalogue) -> "Changes":
+        """Diff two catalogues."""
+        changes = cls()
+        for kind in KINDS:
+            net = changes._changes[kind]
+            before, after = old.get(kind, {}), new.get(kind, {})
+            for id, record in after.items():
+                if id not in before:
+                    net[id] = ("added", record)
+                elif before[id] != record:
+                    net[id] = ("modified", record)
+            for id in before.keys() - after.keys():
+                net[id] = ("removed", None)
+        return changes
+
+    def then(self, later: "Changes") -> "Changes":
+        """Combine these changes with changes made after them.
+
+        A record added then removed, for example, is left out entirely.
+        """
+        combined = Changes()
+        for kind in KINDS:
+            net = combined._changes[kind]
+            net.update(self._changes[kind])
+            for id, (change, record) in later._changes[kind].items():
+                previous = net.get(id, (None, None))[0]
+                if change == "removed" and previous == "added":
+                    del net[id]
+                elif change == "added" and previous == "removed":
+                    net[id] = ("modified", record)
+                elif change == "modified" and previous == "added":
+                    net[id] = ("added", record)
+                else:
+                    net[id] = (change, record)
+        return combined
+
+    def __bool__(self) -> bool:
+        return any(self._changes[kind] for kind in KINDS)
+
+    def to_dict(self) -> dict:
+        result = {}
+        for kind in KINDS:
+            added, removed, modified = [], [], []
+            for id, (change, record) in sorted(self._changes[kind].items()):
+                if change == "added":
+                    added.append(record)
+                elif change == "modified":
+                    modified.append(record)
+                else:
+                    removed.append(id)
+            result[kind] = {
+                "added": added,
+                "removed": removed,
+                "modified": modified,
+            }
+        return result
+
+
+class Delta:
+    """The changes that took the catalogue from one version to the next."""
+
+    __slots__ = ("from_version", "to_version", "changes")
+
+    def __init__(
+        self, from_version: str, to_version: str, changes: Changes
+    ) -> None:
+        self.from_version = from_version
+        self.to_version = to_version
+        self.changes = changes
+
+
+class ChangeFeed:
+    """Tracks successive versions of the catalogue and how they differ.
+
+    Versions are digests of the catalogue's contents, so they survive
+    restarts as long as the catalogue does not change. Only the last
+    `max_history` deltas are kept; clients further behind than that
+    have to sync the whole catalogue again.
+
+    The catalogue is re-fetched at most every `refresh_interval`
+    seconds. If fetching it fails, the catalogue already fetched is
+    kept and the fetch is retried after `retry_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Catalogue],
+        refresh_interval: float,
+        max_history: int,
+        retry_interval: float = 30.0,
+    ) -> None:
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.history: collections.deque[Delta] = collections.deque(
+            maxlen=max_history
+        )
+        self.catalogue: Catalogue | None = None
+        self.version: str | None = None
+        self._refresh_at = 0.0
+        self._lock = threading.RLock()
+
+    def sync(self, since: str | None) -> tuple[str | None, Changes | None]:
+        """Refresh the catalogue and retrieve the changes made since a
+        version, along with the version they lead up to.
+
+        Args:
+            since: The version the client last synced, or None to
+                retrieve the whole catalogue.
+
+        Raises:
+            An MBTAError if the catalogue could not be fetched and none
+            has been fetched yet.
+
+        Returns:
+            The current version and either the changes made since
+            `since`, or None if `since` is too old, or unknown, to tell.
+        """
+        with self._lock:
+            self.refresh()
+            changes = self.everything() if since is None else self.since(since)
+            return self.version, changes
+
+    def refresh(self) -> None:
+        """Fetch the catalogue if it has not been fetched recently.
+
+        Raises:
+            An MBTAError if the catalogue could not be fetched and none
+            has been fetched yet.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.catalogue is not None and now < self._refresh_at:
+                return
+
+            try:
+                catalogue = self.fetch()
+            except mbta.MBTAError as e:
+                if self.catalogue is None:
+                    raise
+                logger.warning(
+                    f"Could not refresh the catalogue, keeping version "
+                    f"{self.version}: {e}"
+                )
+                self._refresh_at = now + self.retry_interval
+                return
+
+            self.update(catalogue)
+            self._refresh_at = now + self.refresh_interval
+
+    def update(self, catalogue: Catalogue) -> None:
+        """Record a newly fetched catalogue."""
+        version = catalogue_version(catalogue)
+        with self._lock:
+            if version == self.version:
+                return
+
+            if self.catalogue is not None and self.version is not None:
+                changes = Changes.between(self.catalogue, catalogue)
+                self.history.append(Delta(self.version, version, changes))
+
+            logger.info(f"Catalogue is now at version {version}.")
+            self.catalogue = catalogue
+            self.version = version
+
+    def since(self, version: str) -> Changes | None:
+        """Retrieve the changes made since a version.
+
+        Args:
+            version: The version the client last synced.
+
+        Returns:
+            The combined changes made since `version`, or None if
+            `version` is too old, or unknown, to tell.
+        """
+        with self._lock:
+            if version == self.version:
+                return Changes()
+            deltas = list(self.history)
+
+        for start in range(len(deltas) - 1, -1, -1):
+            if deltas[start].from_version == version:
+                break
+        else:
+            return None
+
+        changes = Changes()
+        for delta in deltas[start:]:
+            changes = changes.then(delta.changes)
+        return changes
+
+    def everything(self) -> Changes:
+        """Retrieve the whole catalogue as additions."""
+        return Changes.between({}, self.catalogue or {})
+
+    def clear(self) -> None:
+        with self._lock:
+            self.history.clear()
+            self.catalogue = None
+            self.version = None
+            self._refresh_at = 0.0
+
+
+def catalogue_version(catalogue: Catalogue) -> str:
+    """Retrieve a version identifying the contents of a catalogue."""
+    encoded = json.dumps(catalogue, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
@@ -0,0 +1,50 @@
+from typing import Callable
+
+import fastapi
+
+from gbpt_api import mbta
+from gbpt_api.changes.feed import Catalogue, ChangeFeed
+from gbpt_api.core import settings
+from gbpt_api.core.concurrency import blocking
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+router = fastapi.APIRouter()
+
+
+def _fetch_catalogue() -> Catalogue:
+    """Fetch the lines and stops, keyed by their IDs."""
+    client = mbta.Client()
+    calls: list[Callable[[], list]] = [client.list_routes, client.list_stops]
+    routes, stops = mbta.fan_out(calls)
+    return {
+        "lines": {
+            route.id: {"id": route.id, "name": route.name} for route in routes
+        },
+        "stops": {
+            stop.id: {"id": stop.id, "name": stop.name} for stop in stops
+        },
+    }
+
+
+feed = ChangeFeed(
+    _fetch_catalogue,
+    refresh_interval=settings.CHANGES_REFRESH_INTERVAL,
+    max_history=settings.CHANGES_MAX_HISTORY,
+)
+
+
+@router.get("/changes")
+@blocking
+def get_changes(since: str | None = None):
+    version, changes = feed.sync(since)
+    if changes is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_410_GONE,
+            detail=(
+                f"Changes since version {since} are no longer known. "
+                "Sync again without `since`."
+            ),
+        )
+
+    return {"since": since, "version": version, **changes.to_dict()}
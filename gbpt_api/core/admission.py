@@ -0,0 +1,164 @@
+import collections
+import math
+import time
+from typing import Callable
+
+import fastapi
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import (
+    BaseHTTPMiddleware,
+    RequestResponseEndpoint,
+)
+from starlette.types import ASGIApp
+
+from gbpt_api import mbta
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, in bursts of up to
+    `capacity` requests.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: int, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = now
+
+    def take(self, now: float) -> float:
+        """Take a token out of the bucket.
+
+        Args:
+            now: The current time, in seconds.
+
+        Returns:
+            Zero if a token was taken, otherwise the number of seconds
+            until one will be available.
+        """
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Decides which requests the API takes on.
+
+    Each client gets its own token bucket, so one client making too
+    many requests is turned away without affecting anyone else. Past
+    `max_concurrency` requests in flight, further requests are only
+    answered from cached MBTA responses, so a busy API sheds load
+    instead of queuing more calls against the MBTA rate limit.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self._clock = clock
+        self._buckets: collections.OrderedDict[
+            str, TokenBucket
+        ] = collections.OrderedDict()
+
+    def admit(self, client: str) -> float:
+        """Check whether a client may make a request.
+
+        Args:
+            client: Identifies the client, i.e. its address.
+
+        Returns:
+            Zero if the request is admitted, otherwise the number of
+            seconds the client should wait before trying again.
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        now = self._clock()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+
+        return bucket.take(now)
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.max_concurrency
+
+
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    """Applies an AdmissionController to every request.
+
+    Clients over their rate get a 429, and requests that would need to
+    call the MBTA API while the API is saturated get a 503. Both carry a
+    `Retry-After` header.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        super().__init__(app)
+        self.controller = controller
+
+    async def dispatch(
+        self, request: fastapi.Request, call_next: RequestResponseEndpoint
+    ) -> fastapi.Response:
+        client = request.client.host if request.client else "unknown"
+
+        retry_after = self.controller.admit(client)
+        if retry_after:
+            mbta.counters.increment("admission.rate_limited")
+            return _reject(
+                fastapi.status.HTTP_429_TOO_MANY_REQUESTS,
+                "Too many requests.",
+                retry_after,
+            )
+
+        token = None
+        if self.controller.saturated:
+            mbta.counters.increment("admission.cache_only")
+            token = mbta.cache_only.set(True)
+
+        self.controller.in_flight += 1
+        try:
+            return await call_next(request)
+        except mbta.SaturatedError:
+            mbta.counters.increment("admission.shed")
+            return _reject(
+                fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+                "The API is too busy. Please try again shortly.",
+                1,
+            )
+        finally:
+            self.controller.in_flight -= 1
+            if token is not None:
+                mbta.cache_only.reset(token)
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
@@ -1,9 +1,19 @@
+import math
 from pathlib import Path
 from typing import Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
-from gbpt_api.core.logger import configure_logger, get_logger
+from gbpt_api import gtfs_realtime, mbta
+from gbpt_api.core import settings
+from gbpt_api.core.admission import AdmissionController, AdmissionMiddleware
+from gbpt_api.core.logger import (
+    RequestLoggingMiddleware,
+    configure_logger,
+    get_logger,
+)
+from gbpt_api.core.profiling import ProfilingMiddleware
 from gbpt_api.core.utils import combine_module_attrs, module_path
 
 logger = get_logger(__name__)
@@ -20,6 +30,27 @@ def run_api() -> FastAPI:
 
     app = FastAPI(title="Greater Boston Public Transit API")
     app = _attach_api_routers(app, module_path())
+    app = _attach_error_handlers(app)
+    app = _attach_cache_persister(app)
+    app = _attach_vehicle_poller(app)
+    if settings.LOG_REQUESTS:
+        app.add_middleware(RequestLoggingMiddleware)
+        # Requests are logged by the middleware, with their timings.
+        get_logger("uvicorn.access").disabled = True
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=settings.PROFILING_TOKEN,
+            directory=settings.PROFILING_DIR,
+        )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=AdmissionController(
+            rate=settings.ADMISSION_RATE,
+            burst=settings.ADMISSION_BURST,
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        ),
+    )
 
     return app
 
@@ -40,3 +71,100 @@ def _attach_api_routers(app: FastAPI, path: Union[str, Path]) -> FastAPI:
         app.include_router(router, prefix="/v1")
 
     return app
+
+
+def _attach_error_handlers(app: FastAPI) -> FastAPI:
+    """Answers with a 503 when the MBTA API cannot be called.
+
+    Both errors carry a `Retry-After` header: until the circuit breaker
+    lets calls through again, or a second when the MBTA API could not be
+    reached.
+
+    Args:
+        app: The FastAPI app to attach the handlers to.
+
+    Returns:
+        A FastAPI app with the handlers attached.
+    """
+
+    async def circuit_open(
+        request: Request, error: mbta.CircuitOpenError
+    ) -> JSONResponse:
+        return _unavailable(
+            "The MBTA API is unavailable. Please try again later.",
+            error.retry_after,
+        )
+
+    async def unreachable(
+        request: Request, error: mbta.TransportError
+    ) -> JSONResponse:
+        return _unavailable("The MBTA API could not be reached.", 1)
+
+    app.add_exception_handler(mbta.CircuitOpenError, circuit_open)
+    app.add_exception_handler(mbta.TransportError, unreachable)
+
+    return app
+
+
+def _unavailable(detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def _attach_cache_persister(app: FastAPI) -> FastAPI:
+    """Restores the MBTA response cache and keeps it saved.
+
+    The cache is restored right away, before the app takes any traffic.
+    Saving and revalidating the restored responses start with the app.
+
+    Args:
+        app: The FastAPI app to attach the persister to.
+
+    Returns:
+        A FastAPI app that persists the MBTA response cache, if the
+        MBTA_CACHE_PATH setting is set.
+    """
+    if not settings.MBTA_CACHE_PATH:
+        return app
+
+    persister = mbta.CachePersister(
+        mbta.client.default_cache,
+        settings.MBTA_CACHE_PATH,
+        save_interval=settings.MBTA_CACHE_SAVE_INTERVAL,
+    )
+    persister.restore()
+
+    app.add_event_handler("startup", persister.start)
+    app.add_event_handler("shutdown", persister.stop)
+
+    return app
+
+
+def _attach_vehicle_poller(app: FastAPI) -> FastAPI:
+    """Keeps the vehicle positions up to date while the app runs.
+
+    Args:
+        app: The FastAPI app to attach the poller to.
+
+    Returns:
+        A FastAPI app that polls the GTFS-realtime vehicle positions,
+        if the GTFS_RT_VEHICLE_POSITIONS setting is set.
+    """
+    if not settings.GTFS_RT_VEHICLE_POSITIONS:
+        return app
+
+    poller = gtfs_realtime.FeedPoller(
+        gtfs_realtime.FeedSource(
+            settings.GTFS_RT_VEHICLE_POSITIONS, timeout=settings.MBTA_TIMEOUT
+        ),
+        gtfs_realtime.state.default_state,
+        interval=settings.GTFS_RT_POLL_INTERVAL,
+    )
+
+    app.add_event_handler("startup", poller.start)
+    app.add_event_handler("shutdown", poller.stop)
+
+    return app
@@ -0,0 +1,47 @@
+import contextvars
+import functools
+from typing import Awaitable, Callable, ParamSpec, TypeVar
+
+from starlette import concurrency
+
+from gbpt_api.core import profiling
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+async def run_in_threadpool(
+    func: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """Run a blocking call on a worker thread.
+
+    The call runs in a copy of the current context, so per-request state
+    like `mbta.cache_only` and request timings carries over to it. The
+    worker thread is profiled along with the request, if it is.
+    """
+    context = contextvars.copy_context()
+
+    def profiled() -> T:
+        with profiling.follow():
+            return func(*args, **kwargs)
+
+    def call() -> T:
+        return context.run(profiled)
+
+    return await concurrency.run_in_threadpool(call)
+
+
+def blocking(func: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+    """Run a route that makes blocking calls, i.e. to the MBTA client,
+    on a worker thread.
+
+    The MBTA client sleeps between retries and waits on hedged calls, so
+    running it on the event loop would stall every other request,
+    streams included.
+    """
+
+    @functools.wraps(func)
+    async def route(*args: P.args, **kwargs: P.kwargs) -> T:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    return route
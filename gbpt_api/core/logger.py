@@ -1,12 +1,39 @@
+import atexit
+import copy
+import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+import time
 from pathlib import Path
 
+import fastapi
 import yaml  # type: ignore
+from starlette.middleware.base import (
+    BaseHTTPMiddleware,
+    RequestResponseEndpoint,
+)
+
+from gbpt_api.core import timing
+
+# Loggers whose handlers run on background threads: the root logger and
+# uvicorn's, which do not propagate to it.
+QUEUED_LOGGERS = ("", "uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listeners: dict[str, logging.handlers.QueueListener] = {}
+_request_logger = logging.getLogger("gbpt_api.requests")
 
 
 def configure_logger():
+    """Configure logging from the logging config file.
+
+    The handlers configured on the root logger, and on uvicorn's
+    loggers, are moved behind queues and run on background threads, so
+    writing log records never blocks the thread, or event loop, that
+    logged them.
+    """
     config_path = os.getenv(
         "APP_LOG_CONFIG_PATH", Path(__file__).parent / "etc" / "logging.yaml"
     )
@@ -15,6 +42,49 @@ def configure_logger():
         config = yaml.load(f, Loader=yaml.FullLoader)
         logging.config.dictConfig(config)
 
+    for name in QUEUED_LOGGERS:
+        _queue_handlers(logging.getLogger(name))
+
+
+def stop_logging():
+    """Stop the background threads, writing any records still queued."""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+
+
+def _queue_handlers(logger: logging.Logger):
+    listener = _listeners.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()
+
+    # Handlers already behind a queue, unless configured again since,
+    # are moved behind the new one.
+    handlers = []
+    for handler in logger.handlers:
+        if isinstance(handler, _QueueHandler):
+            handlers.extend(handler.targets)
+        else:
+            handlers.append(handler)
+    if not handlers:
+        return
+
+    # Unbounded, so logging never waits on the listener to catch up.
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records, handlers)
+    # Filters on the queue handler run on the thread that logged the
+    # record, where the current request's timings are still reachable.
+    queue_handler.addFilter(TimingFilter())
+    logger.handlers = [queue_handler]
+
+    if not _listeners:
+        atexit.register(stop_logging)
+    listener = logging.handlers.QueueListener(
+        records, *handlers, respect_handler_level=True
+    )
+    _listeners[logger.name] = listener
+    listener.start()
+
 
 def get_logger(name: str) -> logging.Logger:
     """Retrieve a logger.
@@ -26,3 +96,89 @@ def get_logger(name: str) -> logging.Logger:
         A standard library logging.Logger logger.
     """
     return logging.getLogger(name)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them.
+
+    Records only ever go to the listener in this process, so, unlike
+    the base class, their messages are left to be formatted on the
+    listener's thread rather than the thread that logged them.
+    """
+
+    def __init__(
+        self, records: queue.SimpleQueue, targets: list[logging.Handler]
+    ) -> None:
+        super().__init__(records)
+        # The handlers the listener passes records on to.
+        self.targets = targets
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A copy, so that other handlers see the record as it was.
+        return copy.copy(record)
+
+
+class TimingFilter(logging.Filter):
+    """Attaches the timings of the current request to log records.
+
+    Records get a `timings` attribute with the seconds spent so far in
+    each timed phase of the request that logged them, or an empty dict
+    outside of a request.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        timings = timing.current()
+        record.timings = timings.totals() if timings is not None else {}
+        return True
+
+
+class Truncated:
+    """Defers serializing a value until a log record is formatted.
+
+    The value is serialized as JSON and cut off after `max_chars`
+    characters. Serializing stops there too, so large values stay cheap
+    to log.
+    """
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: object, max_chars: int) -> None:
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        chunks = []
+        length = 0
+        encoder = json.JSONEncoder(default=str)
+        for chunk in encoder.iterencode(self.value):
+            chunks.append(chunk)
+            length += len(chunk)
+            if length > self.max_chars:
+                text = "".join(chunks)[: self.max_chars]
+                return f"{text}... (truncated)"
+        return "".join(chunks)
+
+
+class RequestLoggingMiddleware(BaseHTTPMiddleware):
+    """Times every request and logs it once it has been handled.
+
+    The log record carries the request's total `duration`, in seconds,
+    along with its `timings`, which are also collected for the records
+    logged while handling it.
+    """
+
+    async def dispatch(
+        self, request: fastapi.Request, call_next: RequestResponseEndpoint
+    ) -> fastapi.Response:
+        start = time.perf_counter()
+        with timing.collect() as timings:
+            response = await call_next(request)
+            duration = time.perf_counter() - start
+            breakdown = timings.server_timing()
+            _request_logger.info(
+                f"{request.method} {request.url.path} "
+                f"{response.status_code} in {duration * 1000:.2f}ms"
+                + (f" ({breakdown})" if breakdown else ""),
+                extra={"duration": duration},
+            )
+        return response
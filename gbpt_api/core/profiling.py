@@ -0,0 +1,283 @@
+import collections
+import contextlib
+import contextvars
+import cProfile
+import hmac
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, cast
+
+import fastapi
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.middleware.base import (
+    BaseHTTPMiddleware,
+    RequestResponseEndpoint,
+)
+from starlette.types import ASGIApp
+
+from gbpt_api.core import timing
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_profile: contextvars.ContextVar["Profile | None"] = contextvars.ContextVar(
+    "profile", default=None
+)
+
+
+class Sampler:
+    """Samples the call stacks of a set of threads at a fixed interval.
+
+    The samples are reported as collapsed stacks, one `frame;frame count`
+    line per distinct stack, which flame graph tools take as input.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        self.thread_ids: frozenset[int] = frozenset()
+        self.interval = interval
+        self.samples: collections.Counter[str] = collections.Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profiling-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def add(self, thread_id: int) -> None:
+        self.thread_ids = self.thread_ids | {thread_id}
+
+    def remove(self, thread_id: int) -> None:
+        self.thread_ids = self.thread_ids - {thread_id}
+
+    def collapsed(self) -> str:
+        """Retrieve the samples as collapsed stacks."""
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.samples.items())
+        )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    module = frame.f_globals.get("__name__", "?")
+                    stack.append(f"{module}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    self.samples[";".join(reversed(stack))] += 1
+
+
+class Profile:
+    """A profile of a single request.
+
+    `pstats` profiles are deterministic and record every call made by
+    the threads handling the request. `collapsed` profiles sample their
+    call stacks instead, which costs less and shows where time goes
+    across whole stacks.
+
+    Only the worker threads the request runs its blocking calls on are
+    profiled, see `follow`, so requests interleaved with it on the event
+    loop stay out of its profile. From Python 3.12, though, a profiler
+    records every thread, so `pstats` profiles also take in the calls
+    other requests make on their worker threads meanwhile.
+    """
+
+    MODES = ("pstats", "collapsed")
+
+    # From Python 3.12, profilers record calls on every thread, and only
+    # one can be enabled at a time.
+    PROFILES_EVERY_THREAD = sys.version_info >= (3, 12)
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self._profilers: list[cProfile.Profile] = []
+        self._sampler: Sampler | None = None
+        self._token: contextvars.Token | None = None
+
+    def start(self) -> None:
+        if self.mode == "collapsed":
+            self._sampler = Sampler()
+            self._sampler.start()
+        elif self.PROFILES_EVERY_THREAD:
+            profiler = cProfile.Profile()
+            self._profilers.append(profiler)
+            profiler.enable()
+        self._token = _profile.set(self)
+
+    def stop(self) -> None:
+        if self._token is not None:
+            _profile.reset(self._token)
+            self._token = None
+        if self._sampler is not None:
+            self._sampler.stop()
+        elif self.PROFILES_EVERY_THREAD:
+            self._profilers[0].disable()
+
+    @contextlib.contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the current thread as well, until the block exits."""
+        if self._sampler is not None:
+            thread_id = threading.get_ident()
+            self._sampler.add(thread_id)
+            try:
+                yield
+            finally:
+                self._sampler.remove(thread_id)
+            return
+
+        if self.PROFILES_EVERY_THREAD:
+            # Already recorded by the profiler enabled in `start`.
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        self._profilers.append(profiler)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def report(self) -> str:
+        """Retrieve a human-readable report of the profile."""
+        if self._sampler is not None:
+            return self._sampler.collapsed()
+
+        stream = io.StringIO()
+        stats = self._stats(stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
+        return stream.getvalue()
+
+    def dump(self, path: Path) -> Path:
+        """Store the profile under `path`, returning the file written.
+
+        `pstats` profiles are stored in the binary format read by
+        `pstats.Stats` and tools like snakeviz.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._sampler is None:
+            path = path.with_suffix(".prof")
+            self._stats().dump_stats(path)
+        else:
+            path = path.with_suffix(".collapsed")
+            path.write_text(self.report())
+        return path
+
+    def _stats(self, stream: io.StringIO | None = None) -> pstats.Stats:
+        # Before Python 3.12, every thread has its own profiler.
+        stats = pstats.Stats(stream=stream)
+        for profiler in self._profilers:
+            stats.add(profiler)
+        return stats
+
+
+@contextlib.contextmanager
+def follow() -> Iterator[None]:
+    """Profile the current thread while the block runs, if the request
+    that the current context belongs to is being profiled.
+
+    Used to follow a request onto the worker threads it runs blocking
+    calls on.
+    """
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+
+    with profile.thread():
+        yield
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Profiles requests that ask for it.
+
+    A request is profiled when it sends an `X-Profile` header with the
+    mode to profile in (`pstats` or `collapsed`) along with the
+    configured token in `X-Profile-Token`. The profile is stored in
+    `directory` and its path returned in the `X-Profile-Path` header or,
+    without a directory, returned in place of the response. Profiled
+    responses also carry a `Server-Timing` header with the time spent in
+    each timed phase, i.e. calling and decoding MBTA responses.
+
+    Only one request is profiled at a time: others asking to be while
+    one is are handled without being profiled.
+    """
+
+    def __init__(
+        self, app: ASGIApp, token: str, directory: str | Path = ""
+    ) -> None:
+        super().__init__(app)
+        self.token = token
+        self.directory = Path(directory) if directory else None
+        self._busy = False
+
+    async def dispatch(
+        self, request: fastapi.Request, call_next: RequestResponseEndpoint
+    ) -> fastapi.Response:
+        mode = request.headers.get("X-Profile")
+        if mode is None or self._busy or not self._authorized(request):
+            return await call_next(request)
+
+        if mode not in Profile.MODES:
+            return PlainTextResponse(
+                f"X-Profile must be one of: {', '.join(Profile.MODES)}.",
+                status_code=fastapi.status.HTTP_400_BAD_REQUEST,
+            )
+
+        self._busy = True
+        profile = Profile(mode)
+        try:
+            with timing.collect() as timings:
+                profile.start()
+                try:
+                    response = cast(StreamingResponse, await call_next(request))
+                    body = b"".join(
+                        [chunk async for chunk in response.body_iterator]
+                    )
+                finally:
+                    profile.stop()
+        finally:
+            self._busy = False
+
+        server_timing = timings.server_timing()
+
+        if self.directory is None:
+            return PlainTextResponse(
+                profile.report(),
+                headers={
+                    "Server-Timing": server_timing,
+                    "X-Profile-Status": str(response.status_code),
+                },
+            )
+
+        name = re.sub(r"[^\w-]+", "_", request.url.path).strip("_")
+        path = profile.dump(self.directory / f"{time.time_ns()}-{name}")
+        logger.info(f"Stored profile of {request.url.path} at {path}.")
+
+        headers = dict(response.headers)
+        headers["Server-Timing"] = server_timing
+        headers["X-Profile-Path"] = str(path)
+        return fastapi.Response(
+            body,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=response.media_type,
+        )
+
+    def _authorized(self, request: fastapi.Request) -> bool:
+        given = request.headers.get("X-Profile-Token", "")
+        return bool(self.token) and hmac.compare_digest(given, self.token)
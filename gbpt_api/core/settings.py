@@ -1,3 +1,97 @@
 from decouple import config  # type: ignore
 
 MBTA_API_KEY: str = config("MBTA_API_KEY", default="")
+
+# Seconds to wait on a single MBTA API call before giving up on it.
+MBTA_TIMEOUT: float = config("MBTA_TIMEOUT", default=5.0, cast=float)
+# How many times a failed MBTA API call is retried before raising.
+MBTA_MAX_RETRIES: int = config("MBTA_MAX_RETRIES", default=2, cast=int)
+# Base and cap, in seconds, of the jittered exponential retry backoff.
+MBTA_BACKOFF_BASE: float = config("MBTA_BACKOFF_BASE", default=0.25, cast=float)
+MBTA_BACKOFF_MAX: float = config("MBTA_BACKOFF_MAX", default=5.0, cast=float)
+# Consecutive failures before the circuit breaker opens, and how long
+# it stays open before letting a trial call through.
+MBTA_BREAKER_THRESHOLD: int = config(
+    "MBTA_BREAKER_THRESHOLD", default=5, cast=int
+)
+MBTA_BREAKER_RESET_TIMEOUT: float = config(
+    "MBTA_BREAKER_RESET_TIMEOUT", default=30.0, cast=float
+)
+# Seconds to wait on a call before sending a duplicate (hedged) call.
+# Zero disables hedging.
+MBTA_HEDGE_AFTER: float = config("MBTA_HEDGE_AFTER", default=0.0, cast=float)
+# How calls to the MBTA API are sent: "requests", over HTTP/1.1, or
+# "http2", multiplexed over a single connection (needs the http2 extra).
+MBTA_TRANSPORT: str = config("MBTA_TRANSPORT", default="requests")
+# How many calls `mbta.fan_out` makes at a time.
+MBTA_FAN_OUT_MAX_CONCURRENCY: int = config(
+    "MBTA_FAN_OUT_MAX_CONCURRENCY", default=8, cast=int
+)
+# How many MBTA API responses are kept cached.
+MBTA_CACHE_MAX_ENTRIES: int = config(
+    "MBTA_CACHE_MAX_ENTRIES", default=256, cast=int
+)
+# Seconds a cached MBTA API response is used before it is revalidated.
+MBTA_CACHE_FRESH_FOR: float = config(
+    "MBTA_CACHE_FRESH_FOR", default=30.0, cast=float
+)
+# File the cache is saved to, every MBTA_CACHE_SAVE_INTERVAL seconds and
+# on shutdown, and restored from on startup. Empty disables saving.
+MBTA_CACHE_PATH: str = config("MBTA_CACHE_PATH", default="")
+MBTA_CACHE_SAVE_INTERVAL: float = config(
+    "MBTA_CACHE_SAVE_INTERVAL", default=300.0, cast=float
+)
+# The share of MBTA API responses logged, at DEBUG level to the
+# gbpt_api.mbta.payloads logger, and how many characters of each.
+MBTA_PAYLOAD_LOG_SAMPLE_RATE: float = config(
+    "MBTA_PAYLOAD_LOG_SAMPLE_RATE", default=0.01, cast=float
+)
+MBTA_PAYLOAD_LOG_MAX_CHARS: int = config(
+    "MBTA_PAYLOAD_LOG_MAX_CHARS", default=2000, cast=int
+)
+
+# How many live topics, i.e. the vehicles on a line, are streamed from
+# the MBTA API at once.
+LIVE_MAX_TOPICS: int = config("LIVE_MAX_TOPICS", default=50, cast=int)
+
+# Seconds between checks for a new version of the subway network.
+NETWORK_REFRESH_INTERVAL: float = config(
+    "NETWORK_REFRESH_INTERVAL", default=3600.0, cast=float
+)
+
+# A GTFS-realtime VehiclePositions feed to serve vehicles on lines from,
+# either a URL (i.e. https://cdn.mbta.com/realtime/VehiclePositions.pb)
+# or a local file, and the seconds between polls of it. Empty disables
+# polling. Needs the gtfs-realtime extra.
+GTFS_RT_VEHICLE_POSITIONS: str = config("GTFS_RT_VEHICLE_POSITIONS", default="")
+GTFS_RT_POLL_INTERVAL: float = config(
+    "GTFS_RT_POLL_INTERVAL", default=5.0, cast=float
+)
+
+# Seconds between checks for changes to the lines and stops, and how
+# many sets of changes are kept for clients syncing them.
+CHANGES_REFRESH_INTERVAL: float = config(
+    "CHANGES_REFRESH_INTERVAL", default=300.0, cast=float
+)
+CHANGES_MAX_HISTORY: int = config("CHANGES_MAX_HISTORY", default=100, cast=int)
+
+# Requests per second each client may make on average, and how many
+# requests it may make in a burst. A rate of zero disables the limit.
+ADMISSION_RATE: float = config("ADMISSION_RATE", default=5.0, cast=float)
+ADMISSION_BURST: int = config("ADMISSION_BURST", default=20, cast=int)
+# Requests handled at once before further requests are only served
+# from cached MBTA responses or shed.
+ADMISSION_MAX_CONCURRENCY: int = config(
+    "ADMISSION_MAX_CONCURRENCY", default=32, cast=int
+)
+
+# Whether every request is logged along with how long it took.
+LOG_REQUESTS: bool = config("LOG_REQUESTS", default=True, cast=bool)
+
+# Whether requests can ask to be profiled, and the token they must send
+# in the X-Profile-Token header to do so.
+PROFILING_ENABLED: bool = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_TOKEN: str = config("PROFILING_TOKEN", default="")
+# Where profiles are stored. If empty, profiles are returned in place
+# of the response.
+PROFILING_DIR: str = config("PROFILING_DIR", default="")
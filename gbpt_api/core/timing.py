@@ -0,0 +1,79 @@
+import contextlib
+import contextvars
+import time
+from typing import Iterator
+
+
+class Timings:
+    """The durations of the named phases of a single request.
+
+    Spans added to timings collected within other timings are added to
+    the outer timings too.
+    """
+
+    def __init__(self, parent: "Timings | None" = None) -> None:
+        self.spans: list[tuple[str, float]] = []
+        self.parent = parent
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans.append((name, duration))
+        if self.parent is not None:
+            self.parent.add(name, duration)
+
+    def totals(self) -> dict[str, float]:
+        """Retrieve the total seconds spent in each phase."""
+        totals: dict[str, float] = {}
+        for name, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def server_timing(self) -> str:
+        """Format the totals as a `Server-Timing` header value.
+
+        Reference:
+            - https://www.w3.org/TR/server-timing/
+        """
+        return ", ".join(
+            f"{name};dur={duration * 1000:.2f}"
+            for name, duration in self.totals().items()
+        )
+
+
+_current: contextvars.ContextVar[Timings | None] = contextvars.ContextVar(
+    "timings", default=None
+)
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[Timings]:
+    """Collect the spans timed within the block."""
+    timings = Timings(parent=_current.get())
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def current() -> Timings | None:
+    """Retrieve the timings being collected, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a phase of the current request.
+
+    Nothing is recorded, and next to nothing is spent, unless the block
+    runs within `collect`.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
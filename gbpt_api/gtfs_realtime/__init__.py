@@ -0,0 +1,12 @@
+from .feed import FeedSource, parse_feed
+from .models import Vehicle
+from .poller import FeedPoller
+from .state import VehicleState
+
+__all__ = [
+    "FeedPoller",
+    "FeedSource",
+    "Vehicle",
+    "VehicleState",
+    "parse_feed",
+]
@@ -0,0 +1,107 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import requests
+
+
+class FeedSource:
+    """Where a GTFS-realtime feed is read from.
+
+    Either an http(s) URL, like the MBTA's VehiclePositions.pb, or a
+    local file standing in for one. Reads only return the feed when it
+    changed since the last read: URLs are fetched conditionally, and
+    files are only read again once modified.
+    """
+
+    def __init__(self, location: str, timeout: float) -> None:
+        self.location = location
+        self.timeout = timeout
+        self._validators: dict[str, str] = {}
+        self._modified_at: int | None = None
+
+    @property
+    def is_url(self) -> bool:
+        return self.location.startswith(("http://", "https://"))
+
+    def read(self) -> bytes | None:
+        """Read the feed.
+
+        Raises:
+            A requests.RequestException if the URL could not be
+            fetched, or an OSError if the file could not be read.
+
+        Returns:
+            The encoded feed, or None if it has not changed.
+        """
+        if self.is_url:
+            return self._fetch()
+
+        path = Path(self.location)
+        modified_at = os.stat(path).st_mtime_ns
+        if modified_at == self._modified_at:
+            return None
+
+        data = path.read_bytes()
+        self._modified_at = modified_at
+        return data
+
+    def _fetch(self) -> bytes | None:
+        headers = {}
+        if "Last-Modified" in self._validators:
+            headers["If-Modified-Since"] = self._validators["Last-Modified"]
+        if "ETag" in self._validators:
+            headers["If-None-Match"] = self._validators["ETag"]
+
+        response = requests.get(
+            self.location, headers=headers, timeout=self.timeout
+        )
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        self._validators = {
+            header: response.headers[header]
+            for header in ("Last-Modified", "ETag")
+            if header in response.headers
+        }
+        return response.content
+
+
+def parse_feed(data: bytes) -> Any:
+    """Decode a GTFS-realtime feed.
+
+    Raises:
+        A ValueError if `data` is not a feed, or an ImportError if the
+        protobuf bindings are not installed.
+
+    Returns:
+        The decoded FeedMessage.
+    """
+    feed_message = load_feed_message()
+    from google.protobuf import message  # type: ignore
+
+    try:
+        return feed_message.FromString(data)
+    except message.DecodeError as e:
+        raise ValueError(f"Not a GTFS-realtime feed: {e}") from e
+
+
+def load_feed_message() -> Any:
+    """Retrieve the FeedMessage protobuf class.
+
+    Requires the optional `gtfs-realtime` extra, which installs the
+    protobuf bindings.
+
+    Raises:
+        An ImportError if the bindings are not installed.
+    """
+    try:
+        from google.transit import gtfs_realtime_pb2  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            "Reading GTFS-realtime feeds requires gtfs-realtime-bindings. "
+            "Install it with `poetry install -E gtfs-realtime`."
+        ) from e
+
+    return gtfs_realtime_pb2.FeedMessage
@@ -0,0 +1,94 @@
+import sys
+from typing import Any
+
+
+class Vehicle:
+    """A vehicle's latest position, keeping only the fields we use."""
+
+    __slots__ = (
+        "id",
+        "label",
+        "route_id",
+        "trip_id",
+        "direction_id",
+        "stop_id",
+        "status",
+        "latitude",
+        "longitude",
+        "bearing",
+        "timestamp",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        label: str,
+        route_id: str,
+        trip_id: str,
+        direction_id: int,
+        stop_id: str,
+        status: str,
+        latitude: float,
+        longitude: float,
+        bearing: float,
+        timestamp: int,
+    ) -> None:
+        self.id = sys.intern(id)
+        self.label = label
+        self.route_id = sys.intern(route_id)
+        self.trip_id = trip_id
+        self.direction_id = direction_id
+        self.stop_id = sys.intern(stop_id)
+        self.status = status
+        self.latitude = latitude
+        self.longitude = longitude
+        self.bearing = bearing
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_entity(cls, entity: Any) -> "Vehicle":
+        """Create a vehicle from a GTFS-realtime FeedEntity holding a
+        VehiclePosition.
+        """
+        position = entity.vehicle
+        return cls(
+            entity.id,
+            position.vehicle.label,
+            position.trip.route_id,
+            position.trip.trip_id,
+            position.trip.direction_id,
+            position.stop_id,
+            position.VehicleStopStatus.Name(position.current_status).lower(),
+            position.position.latitude,
+            position.position.longitude,
+            position.position.bearing,
+            position.timestamp,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "label": self.label,
+            "trip_id": self.trip_id,
+            "direction_id": self.direction_id,
+            "stop_id": self.stop_id,
+            "status": self.status,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "bearing": self.bearing,
+            "updated_at": self.timestamp,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Vehicle):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Vehicle(id={self.id!r}, route_id={self.route_id!r}, "
+            f"stop_id={self.stop_id!r}, status={self.status!r})"
+        )
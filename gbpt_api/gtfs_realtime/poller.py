@@ -0,0 +1,77 @@
+import threading
+
+import requests
+
+from gbpt_api.core.logger import get_logger
+from gbpt_api.gtfs_realtime.feed import (
+    FeedSource,
+    load_feed_message,
+    parse_feed,
+)
+from gbpt_api.gtfs_realtime.state import VehicleState
+
+logger = get_logger(__name__)
+
+
+class FeedPoller:
+    """Keeps a VehicleState up to date with a GTFS-realtime feed.
+
+    The feed is polled every `interval` seconds from a background
+    thread. Polls that find the feed unchanged skip decoding it.
+    """
+
+    def __init__(
+        self, source: FeedSource, state: VehicleState, interval: float
+    ) -> None:
+        """Create a new poller.
+
+        Raises:
+            An ImportError if the protobuf bindings are not installed.
+        """
+        load_feed_message()
+        self.source = source
+        self.state = state
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll(self) -> bool:
+        """Poll the feed once.
+
+        Returns:
+            Whether the feed had changed and was applied.
+        """
+        data = self.source.read()
+        if data is None:
+            return False
+
+        changed = self.state.apply(parse_feed(data))
+        logger.debug(
+            f"Applied {self.source.location}: {changed} vehicles changed."
+        )
+        return True
+
+    def start(self) -> None:
+        """Start polling the feed in the background."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="gtfs-realtime-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.poll()
+            except (requests.RequestException, OSError) as e:
+                logger.warning(f"Could not read {self.source.location}: {e}")
+            except ValueError as e:
+                logger.warning(f"Could not decode {self.source.location}: {e}")
+
+            if self._stopped.wait(self.interval):
+                return
@@ -0,0 +1,136 @@
+import threading
+from typing import Any, Iterable
+
+from gbpt_api.gtfs_realtime.models import Vehicle
+
+# FeedHeader.Incrementality.FULL_DATASET
+FULL_DATASET = 0
+
+
+class VehicleState:
+    """The latest position of every vehicle in a VehiclePositions feed.
+
+    Vehicles are indexed by route and by stop, so the vehicles on a line
+    or at a stop are looked up without scanning the whole fleet. Applying
+    a feed only re-indexes the vehicles whose position was updated since
+    the previous one.
+
+    Updated from the poller's thread and read from the event loop.
+    """
+
+    def __init__(self) -> None:
+        self.timestamp: int | None = None
+        self._vehicles: dict[str, Vehicle] = {}
+        self._by_route: dict[str, set[str]] = {}
+        self._by_stop: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a feed has been applied yet."""
+        return self.timestamp is not None
+
+    def apply(self, message: Any) -> int:
+        """Apply a decoded GTFS-realtime FeedMessage.
+
+        Full datasets replace every vehicle, removing those left out.
+        Differential feeds only add, update and delete the vehicles
+        they mention.
+
+        Args:
+            message: The FeedMessage to apply. Entities that are not
+                vehicle positions, like trip updates, are skipped.
+
+        Returns:
+            The number of vehicles added, updated or removed.
+        """
+        changed = 0
+        seen = set()
+
+        with self._lock:
+            for entity in message.entity:
+                if entity.is_deleted:
+                    changed += self._remove(entity.id)
+                    continue
+                if not entity.HasField("vehicle"):
+                    continue
+
+                seen.add(entity.id)
+                current = self._vehicles.get(entity.id)
+                timestamp = entity.vehicle.timestamp
+                if (
+                    current is not None
+                    and timestamp
+                    and current.timestamp == timestamp
+                ):
+                    continue
+
+                self._put(Vehicle.from_entity(entity))
+                changed += 1
+
+            if message.header.incrementality == FULL_DATASET:
+                for id in self._vehicles.keys() - seen:
+                    changed += self._remove(id)
+
+            self.timestamp = message.header.timestamp
+
+        return changed
+
+    def on_route(
+        self, route_id: str, stop_ids: Iterable[str] | None = None
+    ) -> list[Vehicle]:
+        """Retrieve the vehicles on a route.
+
+        Args:
+            route_id: The ID of the route.
+            stop_ids: Only retrieve vehicles at, or heading to, one of
+                these stops. The feed refers to platforms, not to the
+                stations they belong to.
+
+        Returns:
+            The vehicles, ordered by ID.
+        """
+        with self._lock:
+            ids = self._by_route.get(route_id, set())
+            if stop_ids is not None:
+                ids = ids & set().union(
+                    *(self._by_stop.get(stop_id, ()) for stop_id in stop_ids)
+                )
+            return [self._vehicles[id] for id in sorted(ids)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.timestamp = None
+            self._vehicles.clear()
+            self._by_route.clear()
+            self._by_stop.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._vehicles)
+
+    def _put(self, vehicle: Vehicle) -> None:
+        self._remove(vehicle.id)
+        self._vehicles[vehicle.id] = vehicle
+        self._by_route.setdefault(vehicle.route_id, set()).add(vehicle.id)
+        self._by_stop.setdefault(vehicle.stop_id, set()).add(vehicle.id)
+
+    def _remove(self, id: str) -> int:
+        vehicle = self._vehicles.pop(id, None)
+        if vehicle is None:
+            return 0
+
+        for index, key in (
+            (self._by_route, vehicle.route_id),
+            (self._by_stop, vehicle.stop_id),
+        ):
+            ids = index[key]
+            ids.discard(id)
+            if not ids:
+                del index[key]
+        return 1
+
+
+# Fed by the poller started with the app, if the GTFS_RT_VEHICLE_POSITIONS
+# setting is set.
+default_state = VehicleState()
@@ -2,7 +2,8 @@ import enum
 
 import fastapi
 
-from gbpt_api import mbta
+from gbpt_api import gtfs_realtime, mbta
+from gbpt_api.core.concurrency import blocking
 from gbpt_api.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,22 +17,112 @@ class LineType(enum.Enum):
         return mbta.RouteType[self.name]
 
 
+class LineInclude(enum.Enum):
+    STOPS = "stops"
+
+
 @router.get("/lines")
-async def get_lines(type: LineType | None = None):
+@blocking
+def get_lines(type: LineType | None = None, include: LineInclude | None = None):
     if type is not None:
         route_type = type.to_route_type()
     else:
         route_type = None
 
-    routes = mbta.Client().list_routes(type=route_type)
+    client = mbta.Client()
+    routes = client.list_routes(type=route_type)
 
-    response = []
+    response: list[dict] = []
     for route in routes:
         response.append(
             {
-                "id": route["id"],
-                "name": route["attributes"]["long_name"],
+                "id": route.id,
+                "name": route.name,
             }
         )
 
+    if include is LineInclude.STOPS and response:
+        document = client.list_route_patterns(
+            route_ids=[line["id"] for line in response],
+            include=mbta.patterns.STATIONS_INCLUDE,
+        )
+        for line in response:
+            line["stops"] = _line_stops(document, line["id"])
+
     return response
+
+
+@router.get("/lines/{id}")
+@blocking
+def get_line(id: str):
+    document = mbta.Client().list_route_patterns(
+        route_ids=id, include=mbta.patterns.STATIONS_INCLUDE
+    )
+
+    resource = document.get("route", id)
+    if resource is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"Line {id} not found.",
+        )
+
+    route = mbta.Route.from_resource(resource)
+    return {
+        "id": route.id,
+        "name": route.name,
+        "stops": _line_stops(document, id),
+    }
+
+
+@router.get("/lines/{id}/vehicles")
+@blocking
+def get_line_vehicles(id: str, stop: str | None = None):
+    vehicles = gtfs_realtime.state.default_state
+    if not vehicles.loaded:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Vehicle positions are not available.",
+        )
+
+    stop_ids = _platforms(stop) if stop is not None else None
+    return [
+        vehicle.to_dict()
+        for vehicle in vehicles.on_route(id, stop_ids=stop_ids)
+    ]
+
+
+def _platforms(stop_id: str) -> set[str]:
+    """Resolve a stop to the platforms vehicles are reported at.
+
+    Args:
+        stop_id: The ID of a station, like those returned for a line's
+            stops, or of one of its platforms.
+
+    Returns:
+        The IDs of the station's platforms along with `stop_id` itself.
+    """
+    stops = mbta.Client().list_stops()
+    return {stop_id} | {
+        stop.id for stop in stops if stop.parent_station_id == stop_id
+    }
+
+
+def _line_stops(document: mbta.Document, route_id: str) -> list[dict]:
+    """Collect the stations a line stops at from its route patterns.
+
+    Args:
+        document: A route patterns document including each pattern's
+            representative trip and its stops.
+        route_id: The ID of the line to collect the stations of.
+
+    Returns:
+        The line's stations in the order its typical patterns visit
+        them. Platforms are replaced by their parent station and every
+        station is only listed once.
+    """
+    stations: dict[str, dict] = {}
+    for pattern in mbta.patterns.route_patterns(document, route_id):
+        for station in mbta.patterns.pattern_stations(document, pattern):
+            stations.setdefault(station["id"], station)
+
+    return list(stations.values())
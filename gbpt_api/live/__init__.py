@@ -0,0 +1,6 @@
+from .routes import router as live_router
+
+
+def get_routers():
+    """Hook used by the app to find the routers."""
+    return [live_router]
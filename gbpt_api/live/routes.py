@@ -0,0 +1,124 @@
+import asyncio
+from typing import AsyncIterator, Callable
+
+import fastapi
+from fastapi.responses import StreamingResponse
+
+from gbpt_api import mbta
+from gbpt_api.core import settings
+from gbpt_api.core.concurrency import run_in_threadpool
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+router = fastapi.APIRouter()
+
+# Seconds between keep-alive comments sent to idle subscribers, so that
+# proxies do not close the connection.
+KEEP_ALIVE_INTERVAL = 15.0
+
+hub = mbta.StreamHub(
+    retry_policy=mbta.client.default_retry_policy,
+    max_topics=settings.LIVE_MAX_TOPICS,
+)
+
+
+@router.on_event("shutdown")
+def close_hub():
+    hub.close()
+
+
+@router.get("/live/vehicles")
+async def stream_vehicles(request: fastapi.Request, line: str | None = None):
+    if line is not None:
+        line = await _known_lines(line)
+
+    subscription = _subscribe(
+        ("vehicles", line),
+        lambda: mbta.Client().stream_vehicles(route_ids=line),
+    )
+
+    return StreamingResponse(
+        _event_source(request, subscription), media_type="text/event-stream"
+    )
+
+
+@router.get("/live/predictions")
+async def stream_predictions(request: fastapi.Request, line: str):
+    line = await _known_lines(line)
+
+    subscription = _subscribe(
+        ("predictions", line),
+        lambda: mbta.Client().stream_predictions(route_ids=line),
+    )
+
+    return StreamingResponse(
+        _event_source(request, subscription), media_type="text/event-stream"
+    )
+
+
+async def _known_lines(line: str) -> str:
+    """Check that every line in a comma-separated list of lines exists.
+
+    Each distinct topic opens its own stream to the MBTA API, so only
+    lines the MBTA knows of are streamed, and the same lines always
+    make up the same topic.
+
+    Args:
+        line: The IDs of the lines, separated by commas.
+
+    Raises:
+        An HTTPException if a line does not exist.
+
+    Returns:
+        The IDs of the lines, sorted and without duplicates.
+    """
+    routes = await run_in_threadpool(mbta.Client().list_routes)
+    known = {route.id for route in routes}
+    ids = sorted({id for id in line.split(",") if id})
+    unknown = [id for id in ids if id not in known]
+    if not ids or unknown:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"Line {', '.join(unknown) or line} not found.",
+        )
+
+    return ",".join(ids)
+
+
+def _subscribe(
+    key: tuple[str, str | None], open_stream: Callable[[], mbta.EventStream]
+) -> mbta.Subscription:
+    try:
+        return hub.subscribe(key, open_stream, asyncio.get_running_loop())
+    except mbta.TooManyTopicsError:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live streams are open. Please try again later.",
+        )
+
+
+async def _event_source(
+    request: fastapi.Request, subscription: mbta.Subscription
+) -> AsyncIterator[bytes]:
+    """Relay a subscription's events to a downstream client.
+
+    Args:
+        request: The downstream client's request.
+        subscription: The subscription to relay events from.
+
+    Returns:
+        An iterator of text/event-stream encoded events.
+    """
+    try:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), timeout=KEEP_ALIVE_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+
+            yield event.encode()
+    finally:
+        subscription.close()
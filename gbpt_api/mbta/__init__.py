@@ -1,10 +1,50 @@
-from .client import Client, RouteType
-from .errors import APIError, MBTAError, RateLimitExceededError
+from . import patterns
+from .cache import CacheEntry, ResponseCache, cache_only
+from .client import Client, RouteType, fan_out
+from .errors import (
+    APIError,
+    CircuitOpenError,
+    MBTAError,
+    RateLimitExceededError,
+    SaturatedError,
+    TooManyTopicsError,
+    TransportError,
+)
+from .jsonapi import Document
+from .metrics import counters
+from .models import Route, Stop
+from .persistence import CachePersister
+from .resilience import CircuitBreaker, RetryPolicy
+from .streaming import Event, EventStream, StreamHub, Subscription
+from .transport import HTTP2Transport, RequestsTransport, Transport
 
 __all__ = [
     "APIError",
+    "CacheEntry",
+    "CachePersister",
+    "CircuitBreaker",
+    "CircuitOpenError",
     "Client",
+    "Document",
+    "Event",
+    "EventStream",
+    "HTTP2Transport",
     "RateLimitExceededError",
+    "RequestsTransport",
+    "ResponseCache",
     "MBTAError",
+    "RetryPolicy",
+    "Route",
     "RouteType",
+    "SaturatedError",
+    "Stop",
+    "StreamHub",
+    "Subscription",
+    "TooManyTopicsError",
+    "Transport",
+    "TransportError",
+    "cache_only",
+    "counters",
+    "fan_out",
+    "patterns",
 ]
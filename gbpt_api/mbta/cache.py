@@ -0,0 +1,233 @@
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Set while the API is saturated: calls are answered from the cache
+# rather than queued behind other calls to the MBTA API.
+cache_only: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "mbta_cache_only", default=False
+)
+
+
+class CacheEntry:
+    """A cached MBTA API response along with its validators.
+
+    The response is parsed, i.e. into models, at most once per entry:
+    `parse` keeps the result for every later hit.
+
+    Entries restored from a file are `restored` until they have been
+    revalidated, or have failed to be, and are served as is until then.
+    """
+
+    __slots__ = (
+        "data",
+        "last_modified",
+        "etag",
+        "stored_at",
+        "restored",
+        "_parsed",
+    )
+
+    def __init__(
+        self,
+        data: dict,
+        last_modified: str | None = None,
+        etag: str | None = None,
+        stored_at: float | None = None,
+        restored: bool = False,
+    ) -> None:
+        self.data = data
+        self.last_modified = last_modified
+        self.etag = etag
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.restored = restored
+        self._parsed: tuple[Callable[[dict], Any], Any] | None = None
+
+    def is_fresh(self, fresh_for: float) -> bool:
+        """Whether the entry was stored or revalidated recently enough
+        to be used without revalidating it.
+        """
+        return time.time() - self.stored_at < fresh_for
+
+    def parse(self, parser: Callable[[dict], T]) -> T:
+        """Parse the response, reusing the result of earlier calls.
+
+        Args:
+            parser: Turns the response into what callers use. Parsed
+                results are shared, so callers must not modify them.
+        """
+        parsed = self._parsed
+        if parsed is not None and parsed[0] is parser:
+            return parsed[1]
+
+        result = parser(self.data)
+        self._parsed = (parser, result)
+        return result
+
+    def refreshed(self) -> "CacheEntry":
+        """Retrieve a copy of the entry, stored now, for when the API
+        confirmed the response has not changed.
+        """
+        entry = CacheEntry(self.data, self.last_modified, self.etag)
+        entry._parsed = self._parsed
+        return entry
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Retrieve the headers to revalidate the entry with."""
+        headers = {}
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        return headers
+
+
+class ResponseCache:
+    """A bounded, thread-safe cache of MBTA API responses.
+
+    Entries are keyed by the resource and query parameters called,
+    without the API key. Once full, the least recently used entry is
+    evicted.
+    """
+
+    # Bumped whenever the format written by `dump` changes.
+    FILE_VERSION = 1
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict[
+            str, CacheEntry
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def keys(self) -> list[str]:
+        """Retrieve the keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def dump(self, path: str | Path) -> int:
+        """Write the cache to a file.
+
+        The file is written to a temporary file next to `path` and then
+        moved over it, so a crash mid-write never leaves a truncated
+        cache behind and processes saving at the same time do not write
+        over each other's files.
+
+        Args:
+            path: The file to write the cache to.
+
+        Returns:
+            The number of entries written.
+        """
+        with self._lock:
+            entries = [
+                {
+                    "key": key,
+                    "data": entry.data,
+                    "last_modified": entry.last_modified,
+                    "etag": entry.etag,
+                    "stored_at": entry.stored_at,
+                }
+                for key, entry in self._entries.items()
+            ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = tempfile.NamedTemporaryFile(
+            "w",
+            dir=path.parent,
+            prefix=f".{path.name}.",
+            suffix=".tmp",
+            delete=False,
+        )
+        try:
+            with f:
+                json.dump({"version": self.FILE_VERSION, "entries": entries}, f)
+            os.replace(f.name, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(f.name)
+            raise
+
+        return len(entries)
+
+    def load(self, path: str | Path) -> int:
+        """Add the entries of a file written by `dump` to the cache.
+
+        Args:
+            path: The file to read the cache from.
+
+        Returns:
+            The number of entries read. Missing or unreadable files and
+            files written in another format are ignored.
+        """
+        try:
+            with open(path, "r") as f:
+                contents = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read the MBTA cache at {path}: {e}")
+            return 0
+
+        try:
+            if contents.get("version") != self.FILE_VERSION:
+                logger.info(f"Ignored the outdated MBTA cache at {path}.")
+                return 0
+
+            entries = [
+                (
+                    entry["key"],
+                    CacheEntry(
+                        entry["data"],
+                        last_modified=entry["last_modified"],
+                        etag=entry["etag"],
+                        stored_at=entry["stored_at"],
+                        restored=True,
+                    ),
+                )
+                for entry in contents["entries"]
+            ]
+        except (KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignored the malformed MBTA cache at {path}: {e!r}")
+            return 0
+
+        for key, entry in entries:
+            self.set(key, entry)
+
+        return len(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
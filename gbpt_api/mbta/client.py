@@ -1,13 +1,53 @@
+import contextvars
 import enum
+import logging
+import random
+import time
 import urllib.parse
+from concurrent import futures
+from typing import Callable, Iterable, TypeVar
 
 import requests
 
-from gbpt_api.core import settings
-from gbpt_api.core.logger import get_logger
-from gbpt_api.mbta import errors
+from gbpt_api.core import settings, timing
+from gbpt_api.core.logger import Truncated, get_logger
+from gbpt_api.mbta import (
+    cache,
+    errors,
+    jsonapi,
+    models,
+    resilience,
+    streaming,
+    transport,
+)
+from gbpt_api.mbta.metrics import counters
 
 logger = get_logger(__name__)
+# Logs a sample of the responses received, when enabled for DEBUG.
+payload_logger = get_logger("gbpt_api.mbta.payloads")
+
+# Shared by every Client so that the MBTA API's health is tracked
+# across requests rather than per Client instance.
+default_retry_policy = resilience.RetryPolicy(
+    max_retries=settings.MBTA_MAX_RETRIES,
+    backoff_base=settings.MBTA_BACKOFF_BASE,
+    backoff_max=settings.MBTA_BACKOFF_MAX,
+)
+default_circuit_breaker = resilience.CircuitBreaker(
+    failure_threshold=settings.MBTA_BREAKER_THRESHOLD,
+    reset_timeout=settings.MBTA_BREAKER_RESET_TIMEOUT,
+)
+default_cache = cache.ResponseCache(settings.MBTA_CACHE_MAX_ENTRIES)
+default_transport = transport.create(settings.MBTA_TRANSPORT)
+# Seconds a stream may go without sending anything, keep-alives
+# included, before it is considered dead and re-opened.
+STREAM_READ_TIMEOUT = 60.0
+
+_hedge_executor = futures.ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="mbta-hedge"
+)
+
+T = TypeVar("T")
 
 
 class RouteType(enum.Enum):
@@ -18,6 +58,9 @@ class RouteType(enum.Enum):
         - https://api-v3.mbta.com/docs/swagger/index.html#/Route/ApiWeb_RouteController_index  # noqa: E501
     """
 
+    # Tram, Streetcar, Light rail. Any light rail or street level system
+    # within a metropolitan area.
+    LIGHT_RAIL = 0
     # Subway, Metro. Any underground rail system within a metropolitan area.
     HEAVY_RAIL = 1
 
@@ -26,9 +69,56 @@ class Client:
     API_URI = "https://api-v3.mbta.com"
     API_KEY = settings.MBTA_API_KEY
 
+    def __init__(
+        self,
+        timeout: float | None = None,
+        retry_policy: resilience.RetryPolicy | None = None,
+        circuit_breaker: resilience.CircuitBreaker | None = None,
+        hedge_after: float | None = None,
+        response_cache: cache.ResponseCache | None = None,
+        fresh_for: float | None = None,
+        transport: transport.Transport | None = None,
+    ) -> None:
+        """Create a new MBTA API client.
+
+        Args:
+            timeout: Seconds to wait on a single call. Defaults to
+                the MBTA_TIMEOUT setting.
+            retry_policy: How failed calls are retried. Defaults to
+                a policy built from the MBTA_*_RETRIES/BACKOFF settings.
+            circuit_breaker: The breaker used to fail fast when the
+                MBTA API is unhealthy. Defaults to one shared by all
+                clients.
+            hedge_after: Seconds to wait on a call before sending a
+                duplicate one and using whichever answers first. Zero
+                disables hedging. Defaults to the MBTA_HEDGE_AFTER
+                setting.
+            response_cache: Where responses are cached for
+                revalidation and for when the API is saturated.
+                Defaults to one shared by all clients.
+            fresh_for: Seconds a cached response is used as is before
+                it is revalidated. Defaults to the MBTA_CACHE_FRESH_FOR
+                setting.
+            transport: How calls are sent. Defaults to one shared by
+                all clients, picked by the MBTA_TRANSPORT setting.
+        """
+        self.timeout = settings.MBTA_TIMEOUT if timeout is None else timeout
+        self.retry_policy = retry_policy or default_retry_policy
+        self.circuit_breaker = circuit_breaker or default_circuit_breaker
+        self.hedge_after = (
+            settings.MBTA_HEDGE_AFTER if hedge_after is None else hedge_after
+        )
+        self.response_cache = (
+            default_cache if response_cache is None else response_cache
+        )
+        self.fresh_for = (
+            settings.MBTA_CACHE_FRESH_FOR if fresh_for is None else fresh_for
+        )
+        self.transport = default_transport if transport is None else transport
+
     def list_routes(
         self, type: RouteType | list[RouteType] | None = None
-    ) -> list[dict]:
+    ) -> list[models.Route]:
         """Make a GET /routes call to the MBTA API.
 
         Args:
@@ -36,55 +126,15 @@ class Client:
 
         Returns:
             A list of routes.
-
-            Sample schema of a route:
-                {
-                    "attributes": {
-                        "color": "ED8B00",
-                        "description": "Rapid Transit",
-                        "direction_destinations": [
-                        "Forest Hills",
-                        "Oak Grove"
-                        ],
-                        "direction_names": [
-                        "South",
-                        "North"
-                        ],
-                        "fare_class": "Rapid Transit",
-                        "long_name": "Orange Line",
-                        "short_name": "",
-                        "sort_order": 10020,
-                        "text_color": "FFFFFF",
-                        "type": 1
-                    },
-                    "id": "Orange",
-                    "links": {
-                        "self": "/routes/Orange"
-                    },
-                    "relationships": {
-                        "line": {
-                            "data": {
-                                "id": "line-Orange",
-                                "type": "line"
-                            }
-                        }
-                    },
-                    "type": "route"
-                }
         """
         query_parameters = {"type": self._join(type, ",")}
 
-        response = self._make_request(
-            "GET",
-            "routes",
-            query_parameters=query_parameters,
-        )
-
-        return response["data"]
+        routes = self._get("routes", query_parameters, _parse_routes)
+        return list(routes)
 
     def list_stops(
         self, route_ids: str | list[str] | None = None
-    ) -> list[dict]:
+    ) -> list[models.Stop]:
         """Make a GET /stops call to the MBTA  API.
 
         Args:
@@ -92,53 +142,114 @@ class Client:
 
         Returns:
             A list of stops.
+        """
+        query_parameters = {"route": self._join(route_ids, ",")}
+
+        stops = self._get("stops", query_parameters, _parse_stops)
+        return list(stops)
+
+    def list_route_patterns(
+        self,
+        route_ids: str | list[str] | None = None,
+        include: list[str] | None = None,
+    ) -> jsonapi.Document:
+        """Make a GET /route_patterns call to the MBTA API.
 
-            Sample schema of a stop:
+        Related resources asked for with `include` come back in the same
+        response, so a route with its ordered stops can be fetched in a
+        single call rather than one call per route.
+
+        Args:
+            route_ids: The route IDs to use to filter this response by.
+            include: The relationship paths to include in the response,
+                i.e. ["route", "representative_trip.stops"].
+
+        Returns:
+            A normalized document whose primary data are route patterns.
+            The document is shared with other callers and must not be
+            modified.
+
+            Sample schema of a route pattern:
                 {
                     "attributes": {
-                        "address": "Alewife Brook Pkwy and Cambridge Park Dr, Cambridge, MA 02140",  # noqa: E501
-                        "at_street": null,
-                        "description": null,
-                        "latitude": 42.395428,
-                        "location_type": 1,
-                        "longitude": -71.142483,
-                        "municipality": "Cambridge",
-                        "name": "Alewife",
-                        "on_street": null,
-                        "platform_code": null,
-                        "platform_name": null,
-                        "vehicle_type": null,
-                        "wheelchair_boarding": 1
+                        "direction_id": 0,
+                        "name": "Alewife - Ashmont",
+                        "sort_order": 100100000,
+                        "time_desc": null,
+                        "typicality": 1
                     },
-                    "id": "place-alfcl",
+                    "id": "Red-1-0",
                     "links": {
-                        "self": "/stops/place-alfcl"
+                        "self": "/route_patterns/Red-1-0"
                     },
                     "relationships": {
-                        "facilities": {
-                            "links": {
-                                "related": "/facilities/?filter[stop]=place-alfcl"  # noqa: E501
+                        "representative_trip": {
+                            "data": {
+                                "id": "canonical-Red-C2-0",
+                                "type": "trip"
                             }
                         },
-                        "parent_station": {
-                            "data": null
-                        },
-                        "zone": {
-                            "data": null
+                        "route": {
+                            "data": {
+                                "id": "Red",
+                                "type": "route"
+                            }
                         }
                     },
-                    "type": "stop"
+                    "type": "route_pattern"
                 }
         """
+        query_parameters = {
+            "route": self._join(route_ids, ","),
+            "include": self._join(include, ","),
+        }
+
+        return self._get("route_patterns", query_parameters, jsonapi.normalize)
+
+    def stream_vehicles(
+        self, route_ids: str | list[str] | None = None
+    ) -> streaming.EventStream:
+        """Open a GET /vehicles event stream to the MBTA API.
+
+        Args:
+            route_ids: The route IDs to use to filter the vehicles by.
+
+        Returns:
+            A stream of `reset`, `add`, `update` and `remove` events
+            whose data are vehicle resources.
+        """
         query_parameters = {"route": self._join(route_ids, ",")}
 
-        response = self._make_request(
-            "GET",
-            "stops",
-            query_parameters=query_parameters,
-        )
+        return self._open_stream("vehicles", query_parameters)
+
+    def stream_predictions(
+        self, route_ids: str | list[str]
+    ) -> streaming.EventStream:
+        """Open a GET /predictions event stream to the MBTA API.
+
+        Args:
+            route_ids: The route IDs to use to filter the predictions by.
+                The MBTA API requires predictions to be filtered.
+
+        Returns:
+            A stream of `reset`, `add`, `update` and `remove` events
+            whose data are prediction resources.
+        """
+        query_parameters = {"route": self._join(route_ids, ",")}
+
+        return self._open_stream("predictions", query_parameters)
 
-        return response["data"]
+    def revalidate(self, key: str) -> None:
+        """Revalidate a cached response, refreshing it if it changed.
+
+        Args:
+            key: The cache key of the response, as stored in the
+                response cache.
+        """
+        resource, _, query = key.partition("?")
+        query_parameters = dict(urllib.parse.parse_qsl(query))
+
+        self._make_request("GET", resource, query_parameters, revalidate=True)
 
     def _join(
         self, items: enum.Enum | str | list | None, delim: str
@@ -168,49 +279,311 @@ class Client:
 
         return delim.join(join_elements)
 
+    def _get(
+        self,
+        resource: str,
+        query_parameters: dict | None,
+        parser: Callable[[dict], T],
+    ) -> T:
+        """Make a GET request to the MBTA API and parse its response.
+
+        Cached responses are only parsed once, so hits reuse the models
+        parsed from them.
+
+        Args:
+            resource: The resource to make a request to.
+            query_parameters: An optional set of query parameters to
+                filter the response by.
+            parser: Turns the response into what is returned.
+
+        Returns:
+            The parsed response.
+        """
+        entry = self._request_entry("GET", resource, query_parameters)
+        return entry.parse(parser)
+
     def _make_request(
         self,
         method: str,
         resource: str,
         query_parameters: dict | None = None,
+        revalidate: bool = False,
     ) -> dict:
         """Make a request to the MBTA API.
 
+        See `_request_entry`.
+
+        Returns:
+            The data portion of the JSON response.
+        """
+        return self._request_entry(
+            method, resource, query_parameters, revalidate
+        ).data
+
+    def _request_entry(
+        self,
+        method: str,
+        resource: str,
+        query_parameters: dict | None = None,
+        revalidate: bool = False,
+    ) -> cache.CacheEntry:
+        """Make a request to the MBTA API.
+
         Args:
             method: The HTTP method to use.
             resource: The resource to make a request to.
             query_parameters: An optional set of query parameters to
                 filter the response by.
+            revalidate: Whether to revalidate a cached response even
+                if it is still fresh.
+
+        Failed calls are retried according to the retry policy and
+        short-circuited while the circuit breaker is open.
+
+        Responses are cached. A cached response is returned as is,
+        without calling the API, while it is fresh or while in
+        `cache_only` mode, as is a response restored from a file until
+        it is revalidated. Otherwise, it is revalidated with its
+        `Last-Modified` and `ETag` validators. Responses are trimmed
+        down to their resources before they are cached.
 
         Raises:
-            An MBTAError if the response is a >= 4xx status code.
+            An MBTAError if the response is a >= 4xx status code once
+            retries are exhausted, a TransportError if the API could not
+            be reached, a CircuitOpenError if the breaker is open, or a
+            SaturatedError if the response is not cached while in
+            `cache_only` mode.
 
         Returns:
-            The data portion of the JSON response.
+            The cache entry holding the response.
         """
+        key = self._cache_key(resource, query_parameters)
         uri = self._create_uri(resource, query_parameters=query_parameters)
-        logger.debug(f"Calling {method} {uri}")
 
-        requests_method = getattr(requests, method.lower())
-        response = requests_method(
+        entry = self.response_cache.get(key)
+        if cache.cache_only.get():
+            if entry is None:
+                counters.increment("mbta.cache_only_misses")
+                raise errors.SaturatedError()
+            counters.increment("mbta.cache_only_hits")
+            return entry
+
+        if (
+            entry is not None
+            and not revalidate
+            and entry.is_fresh(self.fresh_for)
+        ):
+            counters.increment("mbta.cache_hits")
+            return entry
+
+        if entry is not None and not revalidate and entry.restored:
+            # Stale, but still to be revalidated in the background.
+            counters.increment("mbta.cache_restored_hits")
+            return entry
+
+        headers = entry.conditional_headers() if entry is not None else {}
+
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            logger.debug(f"Calling {method} {uri} (attempt {attempt + 1})")
+            counters.increment("mbta.requests")
+
+            error: errors.MBTAError
+            try:
+                with timing.span("mbta.send"):
+                    response = self._send(method, uri, headers)
+            except self.transport.errors as e:
+                error = errors.TransportError(e)
+            else:
+                if response.ok:
+                    self.circuit_breaker.record_success()
+                    break
+                error = errors.get_api_error(response)
+
+            if resilience.is_failure(error):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+
+            delay = self.retry_policy.delay(error, attempt)
+            if delay is None:
+                counters.increment("mbta.failures")
+                raise error
+
+            counters.increment("mbta.retries")
+            logger.info(f"Retrying {method} {uri} in {delay:.2f}s: {error}")
+            with timing.span("mbta.backoff"):
+                time.sleep(delay)
+            attempt += 1
+
+        if entry is not None and response.status_code == 304:
+            counters.increment("mbta.cache_revalidated")
+            entry = entry.refreshed()
+            self.response_cache.set(key, entry)
+            return entry
+
+        with timing.span("mbta.decode"):
+            data = response.json()
+        self._log_payload(method, key, response, data)
+        entry = cache.CacheEntry(
+            jsonapi.trim(data),
+            last_modified=response.headers.get("Last-Modified"),
+            etag=response.headers.get("ETag"),
+        )
+        self.response_cache.set(key, entry)
+        return entry
+
+    def _log_payload(
+        self,
+        method: str,
+        key: str,
+        response: transport.Response,
+        data: dict,
+    ) -> None:
+        """Log a sample of the responses received.
+
+        Nothing is serialized unless the response is sampled and the
+        payload logger is enabled for DEBUG, and then only up to
+        MBTA_PAYLOAD_LOG_MAX_CHARS characters.
+        """
+        if not payload_logger.isEnabledFor(logging.DEBUG):
+            return
+        if random.random() >= settings.MBTA_PAYLOAD_LOG_SAMPLE_RATE:
+            return
+
+        payload_logger.debug(
+            "MBTA response to %s %s: %s",
+            method,
+            key,
+            Truncated(
+                {"headers": dict(response.headers), "data": data},
+                settings.MBTA_PAYLOAD_LOG_MAX_CHARS,
+            ),
+        )
+
+    def _send(
+        self, method: str, uri: str, headers: dict[str, str]
+    ) -> transport.Response:
+        """Send a single call, hedging it if it is slow to respond.
+
+        If the call has not completed within `hedge_after` seconds, an
+        identical call is sent and the first successful response wins.
+
+        Args:
+            method: The HTTP method to use.
+            uri: The full uri to call.
+            headers: Extra headers to send.
+
+        Raises:
+            One of the transport's errors if every call sent failed.
+
+        Returns:
+            The response of the call.
+        """
+        if not self.hedge_after:
+            return self._request(method, uri, headers)
+
+        primary = _hedge_executor.submit(self._request, method, uri, headers)
+        try:
+            return primary.result(timeout=self.hedge_after)
+        except futures.TimeoutError:
+            pass
+
+        counters.increment("mbta.hedged_requests")
+        hedge = _hedge_executor.submit(self._request, method, uri, headers)
+
+        error: BaseException | None = None
+        for call in futures.as_completed([primary, hedge]):
+            error = call.exception()
+            if error is None:
+                if call is hedge:
+                    counters.increment("mbta.hedge_wins")
+                return call.result()
+
+        raise error  # type: ignore
+
+    def _request(
+        self, method: str, uri: str, headers: dict[str, str]
+    ) -> transport.Response:
+        """Send a single call to the MBTA API."""
+        return self.transport.send(
+            method,
             uri,
             headers={
                 "Accept-Encoding": "gzip",
                 "Content-Type": "application/vnd.api+json",
+                **headers,
             },
+            timeout=self.timeout,
         )
+
+    def _open_stream(
+        self, resource: str, query_parameters: dict | None = None
+    ) -> streaming.EventStream:
+        """Open a text/event-stream connection to the MBTA API.
+
+        Args:
+            resource: The resource to stream.
+            query_parameters: An optional set of query parameters to
+                filter the stream by.
+
+        Raises:
+            An MBTAError if the response is a >= 4xx status code, a
+            TransportError if the API could not be reached, or a
+            CircuitOpenError if the breaker is open.
+
+        Returns:
+            The open event stream.
+        """
+        uri = self._create_uri(resource, query_parameters=query_parameters)
+        self.circuit_breaker.before_request()
+        logger.debug(f"Streaming GET {uri}")
+
+        try:
+            response = requests.get(
+                uri,
+                headers={"Accept": "text/event-stream"},
+                stream=True,
+                timeout=(self.timeout, STREAM_READ_TIMEOUT),
+            )
+        except requests.RequestException as e:
+            self.circuit_breaker.record_failure()
+            raise errors.TransportError(e)
+
         if not response.ok:
-            raise errors.get_api_error(response)
-
-        data = response.json()
-        logger.debug(
-            {
-                "message": "MBTA response",
-                "data": data,
-                "headers": response.headers,
-            }
+            error = errors.get_api_error(response)
+            if resilience.is_failure(error):
+                self.circuit_breaker.record_failure()
+            response.close()
+            raise error
+
+        self.circuit_breaker.record_success()
+        return streaming.EventStream(response)
+
+    def _cache_key(
+        self, resource: str, query_parameters: dict | None = None
+    ) -> str:
+        """Create the key a response is cached under.
+
+        Args:
+            resource: The resource called.
+            query_parameters: The query parameters called with. Any
+                set to None are skipped over.
+
+        Returns:
+            The resource with its encoded query parameters, sorted so
+            that equivalent calls share a key. The API key is left out.
+        """
+        params_with_values = sorted(
+            (key, value)
+            for key, value in (query_parameters or {}).items()
+            if value is not None
         )
-        return data
+        if not params_with_values:
+            return resource
+
+        return f"{resource}?{urllib.parse.urlencode(params_with_values)}"
 
     def _create_uri(
         self, resource: str, query_parameters: dict | None = None
@@ -240,3 +613,58 @@ class Client:
             uri += f"?{urllib.parse.urlencode(params_with_values)}"
 
         return uri
+
+
+def fan_out(
+    calls: Iterable[Callable[[], T]], max_concurrency: int | None = None
+) -> list[T]:
+    """Make several calls in parallel.
+
+    Each call runs in a copy of the caller's context, so `cache_only`
+    mode and request timings carry over to it. With the http2
+    transport, the calls share a single connection.
+
+    Args:
+        calls: The calls to make, i.e. bound Client methods.
+        max_concurrency: How many calls are made at a time. Defaults
+            to the MBTA_FAN_OUT_MAX_CONCURRENCY setting.
+
+    Raises:
+        The error of the first call to fail, in the order given, once
+        every call has completed.
+
+    Returns:
+        The result of each call, in the order given.
+    """
+    calls = list(calls)
+    if max_concurrency is None:
+        max_concurrency = settings.MBTA_FAN_OUT_MAX_CONCURRENCY
+    if len(calls) <= 1 or max_concurrency <= 1:
+        return [call() for call in calls]
+
+    with futures.ThreadPoolExecutor(
+        max_workers=min(len(calls), max_concurrency),
+        thread_name_prefix="mbta-fan-out",
+    ) as executor:
+        submitted = [
+            executor.submit(_in_copied_context(call)) for call in calls
+        ]
+
+    return [call.result() for call in submitted]
+
+
+def _in_copied_context(call: Callable[[], T]) -> Callable[[], T]:
+    context = contextvars.copy_context()
+
+    def run() -> T:
+        return context.run(call)
+
+    return run
+
+
+def _parse_routes(document: dict) -> list[models.Route]:
+    return [models.Route.from_resource(route) for route in document["data"]]
+
+
+def _parse_stops(document: dict) -> list[models.Stop]:
+    return [models.Stop.from_resource(stop) for stop in document["data"]]
@@ -1,30 +1,36 @@
 import fastapi
-import requests
+
+from gbpt_api.mbta.transport import Response
 
 
 class MBTAError(Exception):
     def __init__(
-        self, response: requests.Response, message: str | None = None
+        self,
+        response: Response | None = None,
+        message: str | None = None,
     ) -> None:
-        if message is None:
+        if message is None and response is not None:
             message = f"{response.status_code} - {response.reason}"
 
         super().__init__(message)
-        self.status_code = response.status_code
-        self.reason = response.reason
+        self.status_code = None
+        self.reason = None
+        if response is not None:
+            self.status_code = response.status_code
+            self.reason = response.reason
 
 
 class APIError(MBTAError):
     """Used to denote a generic >= 4xx error code from the MBTA API."""
 
-    def __init__(self, response: requests.Response) -> None:
+    def __init__(self, response: Response) -> None:
         super().__init__(response)
 
 
 class RateLimitExceededError(MBTAError):
     """MBTA API rate limit has exceeded."""
 
-    def __init__(self, response: requests.Response):
+    def __init__(self, response: Response):
         self.rate_limit_reset = response.headers.get("x-ratelimit-reset")
         super().__init__(
             response,
@@ -32,7 +38,52 @@ class RateLimitExceededError(MBTAError):
         )
 
 
-def get_api_error(response: requests.Response) -> MBTAError:
+class TransportError(MBTAError):
+    """The MBTA API could not be reached or did not respond in time."""
+
+    def __init__(self, error: Exception) -> None:
+        """Wrap one of the errors of the transport the call was sent with.
+
+        Args:
+            error: One of the `errors` of the transport.
+        """
+        super().__init__(message=f"MBTA API unreachable: {error}")
+        self.error = error
+
+
+class CircuitOpenError(MBTAError):
+    """The MBTA API is considered unhealthy and calls are failing fast."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(
+            message=(
+                "MBTA API circuit breaker is open. "
+                f"Retry after {retry_after:.1f} seconds."
+            )
+        )
+        self.retry_after = retry_after
+
+
+class SaturatedError(MBTAError):
+    """We are too busy to call the MBTA API and have nothing cached."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            message="Too busy to call the MBTA API and nothing is cached."
+        )
+
+
+class TooManyTopicsError(MBTAError):
+    """Too many streams are open to the MBTA API to open another."""
+
+    def __init__(self, max_topics: int) -> None:
+        super().__init__(
+            message=f"Already streaming {max_topics} topics from the MBTA API."
+        )
+        self.max_topics = max_topics
+
+
+def get_api_error(response: Response) -> MBTAError:
     """Retrieve errors based on the request response."""
     if response.status_code == fastapi.status.HTTP_429_TOO_MANY_REQUESTS:
         return RateLimitExceededError(response)
@@ -0,0 +1,127 @@
+from typing import Iterator
+
+# A resource is identified by its type and id, i.e. ("stop", "place-alfcl").
+ResourceKey = tuple[str, str]
+
+
+class Document:
+    """A normalized JSON:API compound document.
+
+    Every resource, primary or included, is indexed once by its type and
+    id, so relationships can be followed without scanning and resources
+    included through several paths are only kept once.
+
+    Reference:
+        - https://jsonapi.org/format/#document-compound-documents
+    """
+
+    def __init__(
+        self, data: list[dict], resources: dict[ResourceKey, dict]
+    ) -> None:
+        self.data = data
+        self.resources = resources
+
+    def get(self, type: str, id: str) -> dict | None:
+        """Retrieve a resource by its type and id."""
+        return self.resources.get((type, id))
+
+    def of_type(self, type: str) -> Iterator[dict]:
+        """Retrieve every resource of the given type."""
+        for (resource_type, _), resource in self.resources.items():
+            if resource_type == type:
+                yield resource
+
+    def related(self, resource: dict, relationship: str) -> list[dict]:
+        """Follow one of a resource's relationships.
+
+        Args:
+            resource: The resource whose relationship to follow.
+            relationship: The name of the relationship, i.e. "stops".
+
+        Returns:
+            The related resources that are in the document, in the order
+            the relationship lists them. Related resources that were not
+            included are skipped.
+        """
+        linkage = (
+            resource.get("relationships", {}).get(relationship, {}).get("data")
+        )
+        if linkage is None:
+            return []
+
+        if isinstance(linkage, dict):
+            linkage = [linkage]
+
+        related = []
+        for identifier in linkage:
+            match = self.resources.get((identifier["type"], identifier["id"]))
+            if match is not None:
+                related.append(match)
+
+        return related
+
+
+def normalize(document: dict) -> Document:
+    """Normalize a JSON:API response into a Document.
+
+    Args:
+        document: The decoded JSON:API response.
+
+    Returns:
+        The normalized document. Included resources that appear more than
+        once are de-duplicated by their type and id.
+    """
+    data = document.get("data") or []
+    if isinstance(data, dict):
+        data = [data]
+
+    resources: dict[ResourceKey, dict] = {}
+    for resource in data:
+        resources[(resource["type"], resource["id"])] = resource
+    for resource in document.get("included", []):
+        resources.setdefault((resource["type"], resource["id"]), resource)
+
+    return Document(data, resources)
+
+
+def trim(document: dict) -> dict:
+    """Strip a JSON:API response down to what is read from it.
+
+    Links, meta and the like are dropped, from the document and from
+    each of its resources and their relationships, leaving resources
+    with their identity, attributes and relationship linkage.
+
+    Args:
+        document: The decoded JSON:API response.
+
+    Returns:
+        The trimmed document, with its `data` and `included` resources.
+    """
+    trimmed: dict = {"data": _trim_data(document.get("data"))}
+    if "included" in document:
+        trimmed["included"] = [
+            _trim_resource(resource) for resource in document["included"]
+        ]
+    return trimmed
+
+
+def _trim_data(data: list | dict | None) -> list | dict | None:
+    if isinstance(data, list):
+        return [_trim_resource(resource) for resource in data]
+    if isinstance(data, dict):
+        return _trim_resource(data)
+    return data
+
+
+def _trim_resource(resource: dict) -> dict:
+    trimmed = {
+        key: resource[key]
+        for key in ("id", "type", "attributes")
+        if key in resource
+    }
+    if "relationships" in resource:
+        trimmed["relationships"] = {
+            name: {"data": relationship.get("data")}
+            for name, relationship in resource["relationships"].items()
+        }
+    return trimmed
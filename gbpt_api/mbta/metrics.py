@@ -0,0 +1,37 @@
+import collections
+import threading
+
+
+class Counters:
+    """A thread-safe set of named counters.
+
+    Used to observe how the MBTA client behaves, i.e. how many calls
+    were retried or short-circuited by the circuit breaker.
+    """
+
+    def __init__(self) -> None:
+        self._counts: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Increment the counter `name` by `amount`."""
+        with self._lock:
+            self._counts[name] += amount
+
+    def get(self, name: str) -> int:
+        """Retrieve the current value of the counter `name`."""
+        with self._lock:
+            return self._counts[name]
+
+    def snapshot(self) -> dict[str, int]:
+        """Retrieve a copy of all the counters."""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        """Set all the counters back to zero."""
+        with self._lock:
+            self._counts.clear()
+
+
+counters = Counters()
@@ -0,0 +1,84 @@
+import sys
+
+
+class Route:
+    """A route, i.e. a subway line, keeping only the fields we use.
+
+    Models use `__slots__` and interned IDs rather than holding on to
+    the whole JSON:API resource, so a catalogue of them is compact and
+    attribute access is cheap.
+    """
+
+    __slots__ = ("id", "name", "type")
+
+    def __init__(self, id: str, name: str, type: int) -> None:
+        self.id = sys.intern(id)
+        self.name = name
+        self.type = type
+
+    @classmethod
+    def from_resource(cls, resource: dict) -> "Route":
+        """Create a route from an MBTA route resource."""
+        attributes = resource["attributes"]
+        return cls(resource["id"], attributes["long_name"], attributes["type"])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Route):
+            return NotImplemented
+        return (self.id, self.name, self.type) == (
+            other.id,
+            other.name,
+            other.type,
+        )
+
+    def __repr__(self) -> str:
+        return f"Route(id={self.id!r}, name={self.name!r}, type={self.type})"
+
+
+class Stop:
+    """A stop, keeping only the fields we use."""
+
+    __slots__ = ("id", "name", "parent_station_id")
+
+    def __init__(
+        self, id: str, name: str, parent_station_id: str | None = None
+    ) -> None:
+        self.id = sys.intern(id)
+        self.name = name
+        self.parent_station_id = (
+            sys.intern(parent_station_id) if parent_station_id else None
+        )
+
+    @classmethod
+    def from_resource(cls, resource: dict) -> "Stop":
+        """Create a stop from an MBTA stop resource."""
+        parent_station = (
+            resource.get("relationships", {})
+            .get("parent_station", {})
+            .get("data")
+        )
+        return cls(
+            resource["id"],
+            resource["attributes"]["name"],
+            parent_station["id"] if parent_station else None,
+        )
+
+    @property
+    def station_id(self) -> str:
+        """The ID of the station the stop belongs to."""
+        return self.parent_station_id or self.id
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Stop):
+            return NotImplemented
+        return (self.id, self.name, self.parent_station_id) == (
+            other.id,
+            other.name,
+            other.parent_station_id,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Stop(id={self.id!r}, name={self.name!r}, "
+            f"parent_station_id={self.parent_station_id!r})"
+        )
@@ -0,0 +1,55 @@
+from gbpt_api.mbta.jsonapi import Document
+from gbpt_api.mbta.models import Stop
+
+# Includes everything pattern_stations needs in a route patterns call.
+STATIONS_INCLUDE = ["route", "representative_trip.stops"]
+
+
+def route_patterns(document: Document, route_id: str) -> list[dict]:
+    """Retrieve a route's typical patterns from a route patterns document.
+
+    Args:
+        document: A route patterns document.
+        route_id: The ID of the route to retrieve the patterns of.
+
+    Returns:
+        The route's typical patterns ordered by their sort order, or all
+        of its patterns if none of them are typical.
+    """
+    patterns = [
+        pattern
+        for pattern in document.data
+        if pattern["relationships"]["route"]["data"]["id"] == route_id
+    ]
+    typical = [
+        pattern
+        for pattern in patterns
+        if pattern["attributes"].get("typicality") == 1
+    ]
+
+    return sorted(
+        typical or patterns,
+        key=lambda pattern: pattern["attributes"].get("sort_order", 0),
+    )
+
+
+def pattern_stations(document: Document, pattern: dict) -> list[dict]:
+    """Retrieve the stations a route pattern stops at, in order.
+
+    Args:
+        document: A route patterns document including each pattern's
+            representative trip and its stops.
+        pattern: The route pattern to retrieve the stations of.
+
+    Returns:
+        The stations as `{"id": ..., "name": ...}`. Platforms are
+        replaced by their parent station, so lines stopping at the same
+        station share its ID.
+    """
+    stations = []
+    for trip in document.related(pattern, "representative_trip"):
+        for resource in document.related(trip, "stops"):
+            stop = Stop.from_resource(resource)
+            stations.append({"id": stop.station_id, "name": stop.name})
+
+    return stations
@@ -0,0 +1,106 @@
+import threading
+from pathlib import Path
+
+from gbpt_api.core.logger import get_logger
+from gbpt_api.mbta import errors
+from gbpt_api.mbta.cache import ResponseCache
+from gbpt_api.mbta.client import Client
+from gbpt_api.mbta.metrics import counters
+
+logger = get_logger(__name__)
+
+
+class CachePersister:
+    """Keeps a response cache warm across restarts.
+
+    The cache is restored from a file before the app takes traffic and
+    saved back to it periodically and on shutdown. Once started, the
+    restored responses are revalidated in the background, one at a
+    time, so that a restart neither serves stale data for long nor
+    sends a burst of calls to the MBTA API. Until then, they are served
+    as they were restored.
+    """
+
+    def __init__(
+        self,
+        response_cache: ResponseCache,
+        path: str | Path,
+        save_interval: float,
+    ) -> None:
+        self.response_cache = response_cache
+        self.path = Path(path)
+        self.save_interval = save_interval
+        self._restored: list[str] = []
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def restore(self) -> int:
+        """Restore the cache from its file.
+
+        Returns:
+            The number of responses restored.
+        """
+        count = self.response_cache.load(self.path)
+        self._restored = self.response_cache.keys()
+        counters.increment("mbta.cache_restored", count)
+        logger.info(f"Restored {count} cached MBTA responses from {self.path}.")
+        return count
+
+    def save(self) -> None:
+        """Save the cache to its file."""
+        try:
+            count = self.response_cache.dump(self.path)
+        except OSError as e:
+            logger.warning(f"Could not save the MBTA cache to {self.path}: {e}")
+            return
+
+        logger.debug(f"Saved {count} cached MBTA responses to {self.path}.")
+
+    def start(self) -> None:
+        """Start revalidating restored responses and saving periodically."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="mbta-cache-persister", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and save the cache one last time."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.save()
+
+    def _run(self) -> None:
+        self._revalidate(self._restored)
+        while not self._stopped.wait(self.save_interval):
+            self.save()
+
+    def _revalidate(self, keys: list[str]) -> None:
+        client = Client(response_cache=self.response_cache)
+
+        for index, key in enumerate(keys):
+            if self._stopped.is_set():
+                self._expire(keys[index:])
+                return
+
+            try:
+                client.revalidate(key)
+            except errors.CircuitOpenError:
+                logger.warning("Stopped revalidating the MBTA cache.")
+                self._expire(keys[index:])
+                return
+            except errors.MBTAError as e:
+                logger.warning(f"Could not revalidate {key}: {e}")
+                self._expire([key])
+                continue
+
+            counters.increment("mbta.cache_warm_revalidated")
+
+    def _expire(self, keys: list[str]) -> None:
+        # Restored responses are served as is only while they wait to
+        # be revalidated here; past that, callers revalidate them.
+        for key in keys:
+            entry = self.response_cache.get(key)
+            if entry is not None:
+                entry.restored = False
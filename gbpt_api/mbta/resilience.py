@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from typing import Callable
+
+from gbpt_api.core.logger import get_logger
+from gbpt_api.mbta import errors
+from gbpt_api.mbta.metrics import counters
+
+logger = get_logger(__name__)
+
+
+class RetryPolicy:
+    """Decides whether, and after how long, a failed call is retried.
+
+    Delays use "full jitter" exponential backoff: a random delay between
+    zero and `backoff_base * 2 ** attempt`, capped at `backoff_max`. This
+    keeps many workers that failed at the same time from retrying in
+    lockstep.
+
+    Reference:
+        - https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/  # noqa: E501
+    """
+
+    def __init__(
+        self,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+
+    def backoff(self, attempt: int) -> float:
+        """Retrieve a jittered backoff delay for the given attempt.
+
+        Args:
+            attempt: The zero-based number of the attempt that failed.
+
+        Returns:
+            The number of seconds to wait before trying again.
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def delay(self, error: errors.MBTAError, attempt: int) -> float | None:
+        """Retrieve how long to wait before retrying after `error`.
+
+        Args:
+            error: The error the attempt failed with.
+            attempt: The zero-based number of the attempt that failed.
+
+        Returns:
+            The number of seconds to wait before trying again or None if
+            the call should not be retried.
+        """
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+
+        delay = self.backoff(attempt)
+
+        if isinstance(error, errors.RateLimitExceededError):
+            try:
+                reset_at = float(error.rate_limit_reset)  # type: ignore
+            except (TypeError, ValueError):
+                return delay
+
+            # There is no point retrying before MBTA resets our limit, and
+            # no point holding the caller if that is too far away.
+            until_reset = reset_at - self._clock()
+            if until_reset > self.backoff_max:
+                return None
+            delay = max(delay, until_reset)
+
+        return delay
+
+
+class CircuitBreaker:
+    """Fails calls fast once the MBTA API looks unhealthy.
+
+    The breaker starts closed. After `failure_threshold` consecutive
+    failures it opens and every call raises a CircuitOpenError until
+    `reset_timeout` seconds have passed. It then lets a single trial call
+    through (half-open): a success closes it again, a failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_request(self) -> None:
+        """Check whether a call may go through.
+
+        Raises:
+            A CircuitOpenError if the breaker is open or a trial call
+            is already in flight.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            remaining = self._opened_at + self.reset_timeout - self._clock()
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+                logger.info("MBTA circuit breaker is half-open.")
+                return
+
+        counters.increment("mbta.circuit_open_rejections")
+        raise errors.CircuitOpenError(max(remaining, 0.0))
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("MBTA circuit breaker is closed.")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if need be."""
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    counters.increment("mbta.circuit_opened")
+                    logger.warning("MBTA circuit breaker is open.")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+def is_retryable(error: errors.MBTAError) -> bool:
+    """Whether a call that failed with `error` is worth retrying."""
+    if isinstance(
+        error, (errors.TransportError, errors.RateLimitExceededError)
+    ):
+        return True
+
+    return error.status_code is not None and error.status_code >= 500
+
+
+def is_failure(error: errors.MBTAError) -> bool:
+    """Whether `error` means the MBTA API itself is unhealthy.
+
+    Client errors, including hitting the rate limit, are a problem with
+    our calls rather than with the API and do not count against it.
+    """
+    if isinstance(error, errors.TransportError):
+        return True
+
+    return error.status_code is not None and error.status_code >= 500
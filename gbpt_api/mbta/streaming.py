@@ -0,0 +1,401 @@
+import asyncio
+import json
+import socket
+import threading
+from typing import Callable, Hashable, Iterable, Iterator
+
+import requests
+
+from gbpt_api.core.logger import get_logger
+from gbpt_api.mbta import errors, resilience
+from gbpt_api.mbta.metrics import counters
+
+logger = get_logger(__name__)
+
+
+class Event:
+    """A single server-sent event.
+
+    Reference:
+        - https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation  # noqa: E501
+    """
+
+    __slots__ = ("event", "data", "_encoded")
+
+    def __init__(self, event: str, data: str) -> None:
+        self.event = event
+        self.data = data
+        self._encoded: bytes | None = None
+
+    def encode(self) -> bytes:
+        """Encode the event in the text/event-stream wire format.
+
+        The encoding is cached so that fanning an event out to many
+        subscribers only encodes it once.
+        """
+        if self._encoded is None:
+            lines = [f"event: {self.event}"]
+            lines.extend(f"data: {line}" for line in self.data.split("\n"))
+            self._encoded = ("\n".join(lines) + "\n\n").encode()
+
+        return self._encoded
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return (self.event, self.data) == (other.event, other.data)
+
+    def __repr__(self) -> str:
+        return f"Event(event={self.event!r}, data={self.data!r})"
+
+
+def parse_events(lines: Iterable[str]) -> Iterator[Event]:
+    """Parse lines of a text/event-stream body into events.
+
+    Args:
+        lines: The decoded lines of the stream, without line endings.
+
+    Returns:
+        An iterator of the events in the stream. Comments, such as
+        keep-alives, and events without data are skipped.
+    """
+    event = "message"
+    data: list[str] = []
+
+    for line in lines:
+        if not line:
+            if data:
+                yield Event(event, "\n".join(data))
+            event = "message"
+            data = []
+            continue
+
+        if line.startswith(":"):
+            continue
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+
+
+class EventStream:
+    """An open text/event-stream response from the MBTA API."""
+
+    def __init__(self, response: requests.Response) -> None:
+        self._response = response
+
+    def __iter__(self) -> Iterator[Event]:
+        return parse_events(self._response.iter_lines(decode_unicode=True))
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._response.close()
+
+    def interrupt(self) -> None:
+        """End an iteration of the stream running in another thread.
+
+        Closing the response from another thread would block until the
+        pending read returns, so the socket is shut down instead, which
+        makes the pending read return right away.
+        """
+        connection = getattr(self._response.raw, "connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is None:
+            return
+
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class ResourceState:
+    """The current set of resources described by an MBTA event stream.
+
+    MBTA streams send a `reset` event with every resource followed by
+    incremental `add`, `update` and `remove` events.
+
+    Reference:
+        - https://www.mbta.com/developers/v3-api/streaming
+    """
+
+    def __init__(self) -> None:
+        self.resources: dict[str, dict] = {}
+        # The encoded state, kept until the state next changes.
+        self._snapshot: Event | None = None
+
+    def apply(self, event: Event) -> None:
+        """Apply an event to the state.
+
+        Args:
+            event: The event to apply. Unknown event types are ignored.
+        """
+        if event.event == "reset":
+            self.resources = {
+                resource["id"]: resource for resource in json.loads(event.data)
+            }
+            self._snapshot = event
+        elif event.event in ("add", "update"):
+            resource = json.loads(event.data)
+            self.resources[resource["id"]] = resource
+            self._snapshot = None
+        elif event.event == "remove":
+            self.resources.pop(json.loads(event.data)["id"], None)
+            self._snapshot = None
+
+    def snapshot(self) -> Event:
+        """Retrieve a `reset` event describing the whole state.
+
+        The state is only encoded again once it has changed, so any
+        number of subscribers joining or resyncing in between share a
+        single encoding.
+        """
+        if self._snapshot is None:
+            self._snapshot = Event(
+                "reset", json.dumps(list(self.resources.values()))
+            )
+        return self._snapshot
+
+
+class Subscription:
+    """A downstream consumer of a topic's events.
+
+    Events are handed over to the subscriber's event loop. If the
+    subscriber falls too far behind, its backlog is replaced by a single
+    `reset` event with the topic's current state, so slow consumers
+    cost a bounded amount of memory and never see stale data.
+    """
+
+    def __init__(
+        self,
+        topic: "Topic",
+        loop: asyncio.AbstractEventLoop,
+        max_backlog: int,
+    ) -> None:
+        self._topic = topic
+        self._loop = loop
+        self._queue: asyncio.Queue[Event] = asyncio.Queue(max_backlog)
+        self._closed = False
+
+    async def get(self) -> Event:
+        """Wait for the next event."""
+        return await self._queue.get()
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        if not self._closed:
+            self._closed = True
+            self._topic.unsubscribe(self)
+
+    def deliver(self, event: Event) -> None:
+        """Schedule `event` for delivery. Safe to call from any thread."""
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: Event) -> None:
+        if self._queue.full():
+            counters.increment("mbta.stream_resyncs")
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(self._topic.snapshot())
+            return
+
+        self._queue.put_nowait(event)
+
+
+class Topic:
+    """A single upstream event stream shared by many subscribers.
+
+    A background thread holds the upstream connection open, applying
+    every event to an in-memory state and fanning it out to the
+    subscribers. The connection is re-opened with jittered backoff if
+    it drops.
+    """
+
+    def __init__(
+        self,
+        open_stream: Callable[[], EventStream],
+        retry_policy: resilience.RetryPolicy,
+        on_idle: Callable[["Topic"], None] | None = None,
+        max_backlog: int = 100,
+    ) -> None:
+        self._open_stream = open_stream
+        self._retry_policy = retry_policy
+        self._on_idle = on_idle
+        self._max_backlog = max_backlog
+        self._lock = threading.Lock()
+        self._state = ResourceState()
+        self._subscribers: set[Subscription] = set()
+        self._stream: EventStream | None = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="mbta-stream", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Close the upstream connection and stop the background thread."""
+        self._stopped.set()
+        with self._lock:
+            stream = self._stream
+        if stream is not None:
+            stream.interrupt()
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> Subscription:
+        """Subscribe to the topic's events.
+
+        The subscriber first receives a `reset` event with the current
+        state, followed by every event from then on.
+        """
+        subscription = Subscription(self, loop, self._max_backlog)
+        with self._lock:
+            self._subscribers.add(subscription)
+            subscription.deliver(self._state.snapshot())
+        counters.increment("mbta.stream_subscribers")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+            idle = not self._subscribers
+        counters.increment("mbta.stream_subscribers", -1)
+
+        if idle and self._on_idle is not None:
+            self._on_idle(self)
+
+    def is_idle(self) -> bool:
+        """Whether the topic has no subscribers."""
+        with self._lock:
+            return not self._subscribers
+
+    def snapshot(self) -> Event:
+        """Retrieve a `reset` event describing the current state."""
+        with self._lock:
+            return self._state.snapshot()
+
+    def publish(self, event: Event) -> None:
+        """Apply `event` to the state and fan it out to subscribers."""
+        counters.increment("mbta.stream_events")
+        with self._lock:
+            self._state.apply(event)
+            for subscription in self._subscribers:
+                subscription.deliver(event)
+
+    def _run(self) -> None:
+        attempt = 0
+        while not self._stopped.is_set():
+            try:
+                stream = self._open_stream()
+            except Exception as e:
+                logger.warning(f"Could not open MBTA stream: {e}")
+            else:
+                counters.increment("mbta.stream_connections")
+                with self._lock:
+                    self._stream = stream
+                if self._stopped.is_set():
+                    stream.close()
+                    break
+
+                try:
+                    for event in stream:
+                        attempt = 0
+                        self.publish(event)
+                except Exception as e:
+                    if not self._stopped.is_set():
+                        logger.warning(f"MBTA stream dropped: {e}")
+                finally:
+                    stream.close()
+
+            self._stopped.wait(self._retry_policy.backoff(attempt))
+            attempt += 1
+
+
+class StreamHub:
+    """Shares one upstream connection per topic among all subscribers.
+
+    Topics are opened on their first subscriber and closed once their
+    last subscriber leaves. Each open topic holds a thread and an
+    upstream connection, so at most `max_topics` are open at a time.
+    """
+
+    def __init__(
+        self,
+        retry_policy: resilience.RetryPolicy,
+        max_backlog: int = 100,
+        max_topics: int | None = None,
+    ) -> None:
+        self._retry_policy = retry_policy
+        self._max_backlog = max_backlog
+        self.max_topics = max_topics
+        self._lock = threading.Lock()
+        self._topics: dict[Hashable, Topic] = {}
+
+    def subscribe(
+        self,
+        key: Hashable,
+        open_stream: Callable[[], EventStream],
+        loop: asyncio.AbstractEventLoop,
+    ) -> Subscription:
+        """Subscribe to the topic `key`, opening it if need be.
+
+        Args:
+            key: Identifies the topic, i.e. `("vehicles", "Red")`.
+            open_stream: Opens the upstream stream for the topic. Only
+                called if the topic is not already open.
+            loop: The event loop the subscriber consumes events on.
+
+        Raises:
+            A TooManyTopicsError if `key` is not open and `max_topics`
+            topics already are.
+
+        Returns:
+            A subscription to the topic.
+        """
+        with self._lock:
+            topic = self._topics.get(key)
+            if topic is None:
+                if (
+                    self.max_topics is not None
+                    and len(self._topics) >= self.max_topics
+                ):
+                    raise errors.TooManyTopicsError(self.max_topics)
+                topic = Topic(
+                    open_stream,
+                    self._retry_policy,
+                    on_idle=lambda topic: self._close(key, topic),
+                    max_backlog=self._max_backlog,
+                )
+                self._topics[key] = topic
+                topic.start()
+
+            return topic.subscribe(loop)
+
+    def topics(self) -> list[Hashable]:
+        """Retrieve the keys of the open topics."""
+        with self._lock:
+            return list(self._topics)
+
+    def close(self) -> None:
+        """Close every open topic."""
+        with self._lock:
+            topics = list(self._topics.values())
+            self._topics.clear()
+
+        for topic in topics:
+            topic.stop()
+
+    def _close(self, key: Hashable, topic: Topic) -> None:
+        with self._lock:
+            if self._topics.get(key) is not topic:
+                return
+            if not topic.is_idle():
+                return
+            del self._topics[key]
+
+        topic.stop()
@@ -0,0 +1,153 @@
+import abc
+from typing import Any, Protocol
+
+import requests
+
+
+class Response(Protocol):
+    """The parts of a response the client reads, as requests has them."""
+
+    @property
+    def status_code(self) -> int:
+        ...
+
+    @property
+    def reason(self) -> str:
+        ...
+
+    @property
+    def headers(self) -> Any:
+        ...
+
+    @property
+    def ok(self) -> bool:
+        ...
+
+    def json(self) -> Any:
+        ...
+
+
+class Transport(abc.ABC):
+    """Sends single calls to the MBTA API."""
+
+    # Raised when the MBTA API could not be reached or did not respond
+    # in time.
+    errors: tuple[type[Exception], ...] = (requests.RequestException,)
+
+    @abc.abstractmethod
+    def send(
+        self, method: str, uri: str, headers: dict[str, str], timeout: float
+    ) -> Response:
+        """Send a call, returning its response whatever its status.
+
+        Raises:
+            One of `errors` if the MBTA API could not be reached or did
+            not respond in time.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    """Sends each call with requests, over its own HTTP/1.1 connection."""
+
+    def send(
+        self, method: str, uri: str, headers: dict[str, str], timeout: float
+    ) -> Response:
+        requests_method = getattr(requests, method.lower())
+        return requests_method(uri, headers=headers, timeout=timeout)
+
+
+class HTTP2Response:
+    """An httpx response read the way a requests response is."""
+
+    __slots__ = ("_response",)
+
+    def __init__(self, response: Any) -> None:
+        self._response = response
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def reason(self) -> str:
+        return self._response.reason_phrase
+
+    @property
+    def headers(self) -> Any:
+        return self._response.headers
+
+    @property
+    def ok(self) -> bool:
+        return self._response.status_code < 400
+
+    def json(self) -> Any:
+        return self._response.json()
+
+
+class HTTP2Transport(Transport):
+    """Multiplexes concurrent calls over a single HTTP/2 connection.
+
+    Calls made at the same time, i.e. from `fan_out`, share one
+    connection to the MBTA API rather than each opening their own.
+    Requires the optional `http2` extra, which installs httpx.
+    """
+
+    def __init__(self, client: Any = None) -> None:
+        """Create a new HTTP/2 transport.
+
+        Args:
+            client: The httpx.Client to send calls with. Defaults to a
+                new client with HTTP/2 enabled.
+
+        Raises:
+            An ImportError if httpx is not installed.
+        """
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "The http2 transport requires httpx. "
+                "Install it with `poetry install -E http2`."
+            ) from e
+
+        self.errors = (httpx.HTTPError,)
+        self._client = httpx.Client(http2=True) if client is None else client
+
+    def send(
+        self, method: str, uri: str, headers: dict[str, str], timeout: float
+    ) -> Response:
+        response = self._client.request(
+            method, uri, headers=headers, timeout=timeout
+        )
+        return HTTP2Response(response)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+TRANSPORTS: dict[str, type[Transport]] = {
+    "requests": RequestsTransport,
+    "http2": HTTP2Transport,
+}
+
+
+def create(name: str) -> Transport:
+    """Create a transport by name.
+
+    Args:
+        name: One of the names in TRANSPORTS.
+
+    Raises:
+        A ValueError if no transport goes by `name`.
+    """
+    transport_class = TRANSPORTS.get(name)
+    if transport_class is None:
+        raise ValueError(
+            f"Unknown MBTA transport {name!r}. "
+            f"Expected one of: {', '.join(TRANSPORTS)}."
+        )
+
+    return transport_class()
@@ -0,0 +1,6 @@
+from .routes import router as metrics_router
+
+
+def get_routers():
+    """Hook used by the app to find the routers."""
+    return [metrics_router]
@@ -0,0 +1,15 @@
+import fastapi
+
+from gbpt_api import mbta
+from gbpt_api.core.logger import get_logger
+
+logger = get_logger(__name__)
+router = fastapi.APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "circuit_breaker": mbta.client.default_circuit_breaker.state,
+        "counters": mbta.counters.snapshot(),
+    }
@@ -0,0 +1,6 @@
+from .routes import router as network_router
+
+
+def get_routers():
+    """Hook used by the app to find the routers."""
+    return [network_router]
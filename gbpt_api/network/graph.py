@@ -0,0 +1,194 @@
+import hashlib
+import heapq
+import json
+from typing import Iterable
+
+# A line's route ID with the stations one of its patterns stops at, in
+# order. Stations are `{"id": ..., "name": ...}`.
+StationSequence = tuple[str, list[dict]]
+
+
+class Path:
+    """The result of a trip planned across the network."""
+
+    __slots__ = ("stops", "transfers", "legs")
+
+    def __init__(self, stops: int, transfers: int, legs: list[dict]) -> None:
+        self.stops = stops
+        self.transfers = transfers
+        self.legs = legs
+
+    def to_dict(self) -> dict:
+        return {
+            "stops": self.stops,
+            "transfers": self.transfers,
+            "legs": self.legs,
+        }
+
+
+class SubwayGraph:
+    """The subway network as a graph of stations joined by lines.
+
+    Stations shared by several lines, like Park Street, are a single
+    node, which is where transfers happen. The graph is built once and
+    stored as flat adjacency arrays: the neighbours of station `i` are
+    `targets[offsets[i]:offsets[i + 1]]`, reached on the lines in the
+    matching slice of `edge_lines`.
+
+    Trips minimise the number of stops, then the number of transfers.
+    The search tree from each origin is cached, so once a station has
+    been planned from, every trip from it is a lookup.
+    """
+
+    def __init__(self, sequences: Iterable[StationSequence]) -> None:
+        sequences = list(sequences)
+        self.version = catalogue_version(sequences)
+
+        self.station_ids: list[str] = []
+        self.station_names: list[str] = []
+        self.line_ids: list[str] = []
+        self._station_index: dict[str, int] = {}
+        line_index: dict[str, int] = {}
+
+        neighbours: list[set[tuple[int, int]]] = []
+        for line_id, stations in sequences:
+            line = line_index.setdefault(line_id, len(self.line_ids))
+            if line == len(self.line_ids):
+                self.line_ids.append(line_id)
+
+            previous = None
+            for station in stations:
+                index = self._station_index.get(station["id"])
+                if index is None:
+                    index = len(self.station_ids)
+                    self._station_index[station["id"]] = index
+                    self.station_ids.append(station["id"])
+                    self.station_names.append(station["name"])
+                    neighbours.append(set())
+
+                if previous is not None and previous != index:
+                    neighbours[previous].add((index, line))
+                    neighbours[index].add((previous, line))
+                previous = index
+
+        self.offsets = [0]
+        self.targets: list[int] = []
+        self.edge_lines: list[int] = []
+        for edges in neighbours:
+            for target, line in sorted(edges):
+                self.targets.append(target)
+                self.edge_lines.append(line)
+            self.offsets.append(len(self.targets))
+
+        self._trees: dict[int, tuple[dict, dict]] = {}
+
+    def __contains__(self, station_id: str) -> bool:
+        return station_id in self._station_index
+
+    def path(self, origin: str, destination: str) -> Path | None:
+        """Plan a trip between two stations.
+
+        Args:
+            origin: The ID of the station to leave from.
+            destination: The ID of the station to arrive at.
+
+        Raises:
+            A KeyError if either station is not in the network.
+
+        Returns:
+            The path with the fewest stops, breaking ties by the fewest
+            transfers, or None if the stations are not connected.
+        """
+        source = self._station_index[origin]
+        target = self._station_index[destination]
+
+        if source == target:
+            return Path(0, 0, [])
+
+        costs, parents = self._tree(source)
+        arrivals = [
+            (cost, state) for state, cost in costs.items() if state[0] == target
+        ]
+        if not arrivals:
+            return None
+
+        (stops, transfers), state = min(arrivals)
+        return Path(stops, transfers, self._legs(state, parents))
+
+    def _tree(self, source: int) -> tuple[dict, dict]:
+        """Search every trip from `source`, caching the result.
+
+        States are a station and the line used to reach it, so changing
+        lines at a station can be counted as a transfer.
+        """
+        tree = self._trees.get(source)
+        if tree is not None:
+            return tree
+
+        start = (source, -1)
+        costs: dict[tuple[int, int], tuple[int, int]] = {start: (0, 0)}
+        parents: dict[tuple[int, int], tuple[int, int]] = {}
+        queue = [(0, 0, source, -1)]
+
+        while queue:
+            stops, transfers, station, line = heapq.heappop(queue)
+            if costs[(station, line)] < (stops, transfers):
+                continue
+
+            for edge in range(self.offsets[station], self.offsets[station + 1]):
+                target = self.targets[edge]
+                edge_line = self.edge_lines[edge]
+                cost = (
+                    stops + 1,
+                    transfers + (line != -1 and edge_line != line),
+                )
+                state = (target, edge_line)
+                if state not in costs or cost < costs[state]:
+                    costs[state] = cost
+                    parents[state] = (station, line)
+                    heapq.heappush(queue, (*cost, target, edge_line))
+
+        tree = self._trees[source] = (costs, parents)
+        return tree
+
+    def _legs(self, state: tuple[int, int], parents: dict) -> list[dict]:
+        """Rebuild the legs of the path ending at `state`."""
+        states = [state]
+        while state in parents:
+            state = parents[state]
+            states.append(state)
+        states.reverse()
+
+        legs: list[dict] = []
+        for (previous, _), (station, line) in zip(states, states[1:]):
+            line_id = self.line_ids[line]
+            if not legs or legs[-1]["line"] != line_id:
+                legs.append(
+                    {"line": line_id, "stops": [self._station(previous)]}
+                )
+            legs[-1]["stops"].append(self._station(station))
+
+        return legs
+
+    def _station(self, index: int) -> dict:
+        return {
+            "id": self.station_ids[index],
+            "name": self.station_names[index],
+        }
+
+
+def catalogue_version(sequences: Iterable[StationSequence]) -> str:
+    """Retrieve a version identifying the shape of the network.
+
+    Args:
+        sequences: The station sequences the network is built from.
+
+    Returns:
+        A digest that only changes when the lines, the stations they
+        stop at, or the names of those stations change.
+    """
+    shape = sorted(
+        (line_id, [(station["id"], station["name"]) for station in stations])
+        for line_id, stations in sequences
+    )
+    return hashlib.sha1(json.dumps(shape).encode()).hexdigest()
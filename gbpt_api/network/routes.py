@@ -0,0 +1,150 @@
+import threading
+import time
+
+import fastapi
+
+from gbpt_api import mbta
+from gbpt_api.core import settings
+from gbpt_api.core.concurrency import blocking
+from gbpt_api.core.logger import get_logger
+from gbpt_api.network.graph import (
+    StationSequence,
+    SubwayGraph,
+    catalogue_version,
+)
+
+logger = get_logger(__name__)
+router = fastapi.APIRouter()
+
+SUBWAY_ROUTE_TYPES = [mbta.RouteType.LIGHT_RAIL, mbta.RouteType.HEAVY_RAIL]
+
+
+class NetworkCache:
+    """Holds the subway graph, rebuilding it only when the network changes.
+
+    The network is re-fetched at most every `refresh_interval` seconds,
+    by one caller at a time; other callers keep getting the graph
+    already built meanwhile. If the fetched catalogue has the same
+    version as that graph, the graph and its cached trips are kept
+    without building a new one. If fetching it fails, the graph already
+    built is kept and the fetch is retried after `retry_interval`
+    seconds.
+    """
+
+    def __init__(
+        self, refresh_interval: float, retry_interval: float = 30.0
+    ) -> None:
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._graph: SubwayGraph | None = None
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> SubwayGraph:
+        """Retrieve the subway graph, refreshing it if need be.
+
+        Raises:
+            An MBTAError if the network could not be fetched and no
+            graph has been built yet.
+        """
+        graph = self._graph
+        if graph is not None and time.monotonic() < self._refresh_at:
+            return graph
+
+        if graph is None:
+            # Until there is a graph, every caller waits for one.
+            self._lock.acquire()
+        elif not self._lock.acquire(blocking=False):
+            # Another caller is refreshing it.
+            return graph
+        try:
+            return self._refresh()
+        finally:
+            self._lock.release()
+
+    def _refresh(self) -> SubwayGraph:
+        now = time.monotonic()
+        if self._graph is not None and now < self._refresh_at:
+            # Refreshed by another caller while this one waited.
+            return self._graph
+
+        try:
+            sequences = _fetch_station_sequences()
+        except mbta.MBTAError as e:
+            if self._graph is None:
+                raise
+            logger.warning(
+                f"Could not refresh the subway network, keeping version "
+                f"{self._graph.version}: {e}"
+            )
+            self._refresh_at = now + self.retry_interval
+            return self._graph
+
+        if self._graph is None or (
+            catalogue_version(sequences) != self._graph.version
+        ):
+            self._graph = SubwayGraph(sequences)
+            logger.info(f"Built subway network version {self._graph.version}.")
+        self._refresh_at = now + self.refresh_interval
+
+        return self._graph
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graph = None
+
+
+network = NetworkCache(settings.NETWORK_REFRESH_INTERVAL)
+
+
+@router.get("/routes/path")
+@blocking
+def get_path(
+    origin: str = fastapi.Query(alias="from"),
+    destination: str = fastapi.Query(alias="to"),
+):
+    graph = network.get()
+
+    for station in (origin, destination):
+        if station not in graph:
+            raise fastapi.HTTPException(
+                status_code=fastapi.status.HTTP_404_NOT_FOUND,
+                detail=f"Station {station} is not on the subway.",
+            )
+
+    path = graph.path(origin, destination)
+    if path is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"No path from {origin} to {destination}.",
+        )
+
+    return {"from": origin, "to": destination, **path.to_dict()}
+
+
+def _fetch_station_sequences() -> list[StationSequence]:
+    """Fetch the ordered stations of every subway route pattern.
+
+    Returns:
+        Every subway line's route ID with the stations of one of its
+        typical patterns, for each of those patterns.
+    """
+    client = mbta.Client()
+    route_ids = [
+        route.id for route in client.list_routes(type=SUBWAY_ROUTE_TYPES)
+    ]
+    if not route_ids:
+        return []
+
+    document = client.list_route_patterns(
+        route_ids=route_ids, include=mbta.patterns.STATIONS_INCLUDE
+    )
+
+    sequences = []
+    for route_id in route_ids:
+        for pattern in mbta.patterns.route_patterns(document, route_id):
+            sequences.append(
+                (route_id, mbta.patterns.pattern_stations(document, pattern))
+            )
+
+    return sequences
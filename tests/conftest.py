@@ -2,6 +2,8 @@ from typing import Callable
 
 import pytest
 
+from gbpt_api import mbta
+
 
 @pytest.fixture(scope="module")
 def vcr_config():
@@ -14,3 +16,11 @@ def create_api_path() -> Callable[[str], str]:
         return "http://localhost:8000/v1" + path
 
     return inner
+
+
+@pytest.fixture(autouse=True)
+def clear_mbta_cache():
+    """Keep cached MBTA responses from leaking between tests."""
+    mbta.client.default_cache.clear()
+    yield
+    mbta.client.default_cache.clear()
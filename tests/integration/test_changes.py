@@ -0,0 +1,118 @@
+import json
+
+import fastapi
+import pytest
+import requests
+import requests_mock
+from fastapi.testclient import TestClient
+
+from gbpt_api import mbta
+from gbpt_api.changes.routes import feed
+from gbpt_api.core.app import run_api
+
+test_client = TestClient(run_api())
+
+
+def make_route(id: str, name: str) -> dict:
+    return {
+        "attributes": {"long_name": name, "type": 1},
+        "id": id,
+        "type": "route",
+    }
+
+
+def make_stop(id: str) -> dict:
+    return {
+        "attributes": {"name": id},
+        "id": id,
+        "relationships": {"parent_station": {"data": None}},
+        "type": "stop",
+    }
+
+
+@pytest.fixture
+def catalogue(monkeypatch):
+    """Serves the routes given, with the stops `place-a` and `place-b`."""
+    monkeypatch.setattr(feed, "refresh_interval", 0)
+    feed.clear()
+    with requests_mock.Mocker(real_http=True) as mock:
+        mock.get(
+            mbta.Client.API_URI + "/stops",
+            text=json.dumps(
+                {"data": [make_stop("place-a"), make_stop("place-b")]}
+            ),
+        )
+
+        def serve(*routes: dict) -> None:
+            mbta.client.default_cache.clear()
+            mock.get(
+                mbta.Client.API_URI + "/routes",
+                text=json.dumps({"data": list(routes)}),
+            )
+
+        yield serve
+    feed.clear()
+
+
+def test_get_changes_without_since(create_api_path, catalogue):
+    """Ensure that the whole catalogue is returned as additions."""
+    catalogue(make_route("Red", "Red Line"))
+
+    response = test_client.get(create_api_path("/changes"))
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    body = response.json()
+    assert body["version"]
+    assert body["lines"]["added"] == [{"id": "Red", "name": "Red Line"}]
+    assert [stop["id"] for stop in body["stops"]["added"]] == [
+        "place-a",
+        "place-b",
+    ]
+
+
+def test_get_changes_since(create_api_path, catalogue):
+    catalogue(make_route("Red", "Red Line"), make_route("Blue", "Blue Line"))
+    version = test_client.get(create_api_path("/changes")).json()["version"]
+    catalogue(make_route("Red", "Red"), make_route("Orange", "Orange Line"))
+
+    response = test_client.get(create_api_path(f"/changes?since={version}"))
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    body = response.json()
+    assert body["since"] == version
+    assert body["version"] != version
+    assert body["lines"] == {
+        "added": [{"id": "Orange", "name": "Orange Line"}],
+        "removed": ["Blue"],
+        "modified": [{"id": "Red", "name": "Red"}],
+    }
+    assert body["stops"] == {"added": [], "removed": [], "modified": []}
+
+
+def test_get_changes_since_unknown_version(create_api_path, catalogue):
+    catalogue(make_route("Red", "Red Line"))
+
+    response = test_client.get(create_api_path("/changes?since=unknown"))
+
+    assert response.status_code == fastapi.status.HTTP_410_GONE
+
+
+def test_get_changes_since_when_a_refresh_fails(
+    create_api_path, catalogue, monkeypatch
+):
+    """
+    Ensure that changes are still served from the history when the
+    catalogue cannot be refreshed.
+    """
+    catalogue(make_route("Red", "Red Line"))
+    version = test_client.get(create_api_path("/changes")).json()["version"]
+
+    def fail():
+        raise mbta.TransportError(requests.ConnectionError("Unreachable."))
+
+    monkeypatch.setattr(feed, "fetch", fail)
+
+    response = test_client.get(create_api_path(f"/changes?since={version}"))
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.json()["version"] == version
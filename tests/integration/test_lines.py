@@ -1,11 +1,11 @@
 import json
 
 import fastapi
-import requests_mock
 import pytest
+import requests_mock
 from fastapi.testclient import TestClient
 
-from gbpt_api import mbta
+from gbpt_api import gtfs_realtime, mbta
 from gbpt_api.core.app import run_api
 
 test_client = TestClient(run_api())
@@ -91,3 +91,176 @@ def test_get_routes_invalid_filter(create_api_path):
     response = test_client.get(endpoint)
 
     assert response.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def make_stop(id: str, name: str, parent_station: str | None) -> dict:
+    parent = {"id": parent_station, "type": "stop"} if parent_station else None
+    return {
+        "attributes": {"name": name},
+        "id": id,
+        "relationships": {"parent_station": {"data": parent}},
+        "type": "stop",
+    }
+
+
+def make_pattern(id: str, trip_id: str, typicality: int, sort_order: int):
+    return {
+        "attributes": {"typicality": typicality, "sort_order": sort_order},
+        "id": id,
+        "relationships": {
+            "representative_trip": {"data": {"id": trip_id, "type": "trip"}},
+            "route": {"data": {"id": "Red", "type": "route"}},
+        },
+        "type": "route_pattern",
+    }
+
+
+def make_trip(id: str, stop_ids: list[str]) -> dict:
+    return {
+        "id": id,
+        "relationships": {
+            "stops": {
+                "data": [{"id": stop, "type": "stop"} for stop in stop_ids]
+            }
+        },
+        "type": "trip",
+    }
+
+
+RED_LINE_PATTERNS = {
+    "data": [
+        make_pattern("Red-3-0", "trip-braintree", 1, 2),
+        make_pattern("Red-1-0", "trip-ashmont", 1, 1),
+        make_pattern("Red-9-0", "trip-shuttle", 4, 3),
+    ],
+    "included": [
+        HEAVY_RAIL_ENTRY,
+        make_trip("trip-ashmont", ["70061", "70085"]),
+        make_trip("trip-braintree", ["70061", "70095"]),
+        make_trip("trip-shuttle", ["70061", "shuttle"]),
+        make_stop("70061", "Alewife", "place-alfcl"),
+        make_stop("70085", "Savin Hill", "place-shmnl"),
+        make_stop("70061", "Alewife", "place-alfcl"),
+        make_stop("70095", "North Quincy", "place-nqncy"),
+        make_stop("shuttle", "Shuttle Stop", None),
+    ],
+    "jsonapi": {"version": "1.0"},
+}
+RED_LINE_STOPS = [
+    {"id": "place-alfcl", "name": "Alewife"},
+    {"id": "place-shmnl", "name": "Savin Hill"},
+    {"id": "place-nqncy", "name": "North Quincy"},
+]
+
+
+def test_get_line_with_stops_in_one_upstream_call(create_api_path):
+    endpoint = create_api_path("/lines/Red")
+
+    with requests_mock.Mocker(real_http=True) as mock:
+        patterns = mock.get(
+            mbta.Client.API_URI + "/route_patterns",
+            text=json.dumps(RED_LINE_PATTERNS),
+        )
+        response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.json() == {
+        "id": "Red",
+        "name": "Red Line",
+        "stops": RED_LINE_STOPS,
+    }
+    assert patterns.call_count == 1
+    assert patterns.last_request.qs["include"] == [
+        "route,representative_trip.stops"
+    ]
+
+
+def test_get_line_not_found(create_api_path):
+    endpoint = create_api_path("/lines/Purple")
+
+    with requests_mock.Mocker(real_http=True) as mock:
+        mock.get(
+            mbta.Client.API_URI + "/route_patterns",
+            text=json.dumps({"data": [], "jsonapi": {"version": "1.0"}}),
+        )
+        response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_404_NOT_FOUND
+
+
+def test_get_lines_include_stops(create_api_path):
+    endpoint = create_api_path("/lines?include=stops")
+
+    with requests_mock.Mocker(real_http=True) as mock:
+        mock.get(
+            mbta.Client.API_URI + "/routes",
+            text=json.dumps({"data": [HEAVY_RAIL_ENTRY]}),
+        )
+        patterns = mock.get(
+            mbta.Client.API_URI + "/route_patterns",
+            text=json.dumps(RED_LINE_PATTERNS),
+        )
+        response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.json() == [
+        {"id": "Red", "name": "Red Line", "stops": RED_LINE_STOPS}
+    ]
+    assert patterns.call_count == 1
+
+
+@pytest.fixture
+def vehicles():
+    gtfs_realtime_pb2 = pytest.importorskip("google.transit.gtfs_realtime_pb2")
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1_700_000_000
+    for id, route_id, stop_id in [
+        ("R-1", "Red", "70061"),
+        ("R-2", "Red", "70063"),
+        ("O-1", "Orange", "70061"),
+    ]:
+        entity = message.entity.add(id=id)
+        entity.vehicle.trip.route_id = route_id
+        entity.vehicle.stop_id = stop_id
+
+    state = gtfs_realtime.state.default_state
+    state.apply(message)
+    yield state
+    state.clear()
+
+
+def test_get_line_vehicles(create_api_path, vehicles):
+    response = test_client.get(create_api_path("/lines/Red/vehicles"))
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert [vehicle["id"] for vehicle in response.json()] == ["R-1", "R-2"]
+
+
+ALEWIFE_STOPS = {
+    "data": [
+        make_stop("place-alfcl", "Alewife", None),
+        make_stop("70061", "Alewife", "place-alfcl"),
+        make_stop("Alewife-01", "Alewife", "place-alfcl"),
+        make_stop("70063", "Davis", "place-davis"),
+    ],
+    "jsonapi": {"version": "1.0"},
+}
+
+
+@pytest.mark.parametrize("stop", ["70061", "place-alfcl"])
+def test_get_line_vehicles_at_a_stop(create_api_path, vehicles, stop):
+    endpoint = create_api_path(f"/lines/Red/vehicles?stop={stop}")
+
+    with requests_mock.Mocker(real_http=True) as mock:
+        mock.get(mbta.Client.API_URI + "/stops", text=json.dumps(ALEWIFE_STOPS))
+        response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert [vehicle["id"] for vehicle in response.json()] == ["R-1"]
+
+
+def test_get_line_vehicles_before_positions_are_loaded(create_api_path):
+    response = test_client.get(create_api_path("/lines/Red/vehicles"))
+
+    assert response.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
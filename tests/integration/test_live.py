@@ -0,0 +1,39 @@
+import fastapi
+import pytest
+import requests_mock
+from fastapi.testclient import TestClient
+
+from gbpt_api import mbta
+from gbpt_api.core.app import run_api
+
+test_client = TestClient(run_api())
+
+
+def test_stream_predictions_requires_line(create_api_path):
+    endpoint = create_api_path("/live/predictions")
+
+    response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize("path", ["/live/vehicles", "/live/predictions"])
+def test_stream_unknown_line(create_api_path, path):
+    endpoint = create_api_path(f"{path}?line=Red,Nope")
+
+    with requests_mock.Mocker(real_http=True) as mock:
+        mock.get(
+            f"{mbta.Client.API_URI}/routes",
+            json={
+                "data": [
+                    {
+                        "attributes": {"long_name": "Red Line", "type": 1},
+                        "id": "Red",
+                    }
+                ]
+            },
+        )
+        response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Line Nope not found."}
@@ -0,0 +1,18 @@
+import fastapi
+from fastapi.testclient import TestClient
+
+from gbpt_api import mbta
+from gbpt_api.core.app import run_api
+
+test_client = TestClient(run_api())
+
+
+def test_get_metrics(create_api_path):
+    mbta.counters.increment("mbta.retries")
+
+    response = test_client.get(create_api_path("/metrics"))
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    body = response.json()
+    assert body["circuit_breaker"] == mbta.CircuitBreaker.CLOSED
+    assert body["counters"]["mbta.retries"] >= 1
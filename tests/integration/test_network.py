@@ -0,0 +1,159 @@
+import json
+
+import fastapi
+import pytest
+import requests
+import requests_mock
+from fastapi.testclient import TestClient
+
+from gbpt_api import mbta
+from gbpt_api.core.app import run_api
+from gbpt_api.network import routes as network_routes
+from gbpt_api.network.routes import network
+
+test_client = TestClient(run_api())
+
+
+def make_route(id: str) -> dict:
+    return {
+        "attributes": {"long_name": id, "type": 1},
+        "id": id,
+        "type": "route",
+    }
+
+
+def make_pattern(route_id: str, stop_ids: list[str]) -> tuple[dict, dict]:
+    trip_id = f"trip-{route_id}"
+    pattern = {
+        "attributes": {"typicality": 1, "sort_order": 1},
+        "id": f"{route_id}-0",
+        "relationships": {
+            "representative_trip": {"data": {"id": trip_id, "type": "trip"}},
+            "route": {"data": {"id": route_id, "type": "route"}},
+        },
+        "type": "route_pattern",
+    }
+    trip = {
+        "id": trip_id,
+        "relationships": {
+            "stops": {"data": [{"id": id, "type": "stop"} for id in stop_ids]}
+        },
+        "type": "trip",
+    }
+    return pattern, trip
+
+
+def make_stop(id: str) -> dict:
+    return {
+        "attributes": {"name": id},
+        "id": id,
+        "relationships": {"parent_station": {"data": None}},
+        "type": "stop",
+    }
+
+
+@pytest.fixture
+def subway():
+    red, red_trip = make_pattern("Red", ["place-harsq", "place-pktrm"])
+    green, green_trip = make_pattern("Green-B", ["place-pktrm", "place-gover"])
+    stops = ["place-harsq", "place-pktrm", "place-gover"]
+
+    network.clear()
+    with requests_mock.Mocker(real_http=True) as mock:
+        routes = mock.get(
+            mbta.Client.API_URI + "/routes",
+            text=json.dumps(
+                {"data": [make_route("Red"), make_route("Green-B")]}
+            ),
+        )
+        mock.get(
+            mbta.Client.API_URI + "/route_patterns",
+            text=json.dumps(
+                {
+                    "data": [red, green],
+                    "included": [red_trip, green_trip]
+                    + [make_stop(id) for id in stops],
+                }
+            ),
+        )
+        yield routes
+    network.clear()
+
+
+def test_get_path(create_api_path, subway):
+    endpoint = create_api_path("/routes/path?from=place-harsq&to=place-gover")
+
+    response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    body = response.json()
+    assert (body["stops"], body["transfers"]) == (2, 1)
+    assert [leg["line"] for leg in body["legs"]] == ["Red", "Green-B"]
+
+
+def test_get_path_builds_the_network_once(create_api_path, subway):
+    test_client.get(
+        create_api_path("/routes/path?from=place-harsq&to=place-gover")
+    )
+    test_client.get(
+        create_api_path("/routes/path?from=place-gover&to=place-harsq")
+    )
+
+    assert subway.call_count == 1
+    assert subway.last_request.qs["type"] == ["0,1"]
+
+
+def test_get_path_unknown_station(create_api_path, subway):
+    endpoint = create_api_path("/routes/path?from=place-harsq&to=place-nowhere")
+
+    response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_404_NOT_FOUND
+
+
+def test_get_path_keeps_the_network_when_a_refresh_fails(
+    create_api_path, subway, monkeypatch
+):
+    """
+    Ensure that a failed refresh keeps serving the network already
+    built.
+    """
+    endpoint = create_api_path("/routes/path?from=place-harsq&to=place-gover")
+    monkeypatch.setattr(network, "refresh_interval", 0)
+    test_client.get(endpoint)
+
+    def fail():
+        raise mbta.TransportError(requests.ConnectionError("Unreachable."))
+
+    monkeypatch.setattr(network_routes, "_fetch_station_sequences", fail)
+
+    response = test_client.get(endpoint)
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.json()["stops"] == 2
+
+
+def test_unchanged_network_is_not_rebuilt(subway, monkeypatch):
+    monkeypatch.setattr(network, "refresh_interval", 0)
+    graph = network.get()
+
+    def build(sequences):
+        raise AssertionError("The network was rebuilt.")
+
+    monkeypatch.setattr(network_routes, "SubwayGraph", build)
+
+    assert network.get() is graph
+
+
+def test_network_is_refreshed_by_one_caller_at_a_time(subway, monkeypatch):
+    """
+    Ensure that callers arriving while the network is being refreshed
+    are served the graph already built instead of refreshing it too.
+    """
+    monkeypatch.setattr(network, "refresh_interval", 0)
+    graph = network.get()
+
+    with network._lock:
+        assert network.get() is graph
+
+    assert subway.call_count == 1
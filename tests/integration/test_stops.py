@@ -70,3 +70,22 @@ def test_get_routes_filter_with_no_responses(create_api_path):
 
     assert response.status_code == fastapi.status.HTTP_200_OK
     assert response.json() == []
+
+
+def test_get_stops_while_the_circuit_is_open(create_api_path, monkeypatch):
+    """
+    Ensure that failing fast on the MBTA API answers with a 503 telling
+    the client when to retry.
+    """
+
+    def before_request():
+        raise mbta.CircuitOpenError(12.5)
+
+    monkeypatch.setattr(
+        mbta.client.default_circuit_breaker, "before_request", before_request
+    )
+
+    response = test_client.get(create_api_path("/stops"))
+
+    assert response.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "13"
@@ -0,0 +1,153 @@
+import itertools
+import threading
+from concurrent import futures
+
+import pytest
+import requests
+
+from gbpt_api import mbta
+from gbpt_api.changes.feed import ChangeFeed, Changes, catalogue_version
+
+
+def catalogue(lines: dict[str, str], stops: dict[str, str]) -> dict:
+    return {
+        "lines": {id: {"id": id, "name": name} for id, name in lines.items()},
+        "stops": {id: {"id": id, "name": name} for id, name in stops.items()},
+    }
+
+
+def make_feed(max_history: int = 10) -> ChangeFeed:
+    return ChangeFeed(lambda: {}, refresh_interval=0, max_history=max_history)
+
+
+def test_changes_between_catalogues():
+    """Ensure that additions, removals and modifications are told apart."""
+    old = catalogue({"Red": "Red Line", "Blue": "Blue Line"}, {"a": "A"})
+    new = catalogue({"Red": "Red", "Orange": "Orange Line"}, {"a": "A"})
+
+    changes = Changes.between(old, new).to_dict()
+
+    assert changes["lines"] == {
+        "added": [{"id": "Orange", "name": "Orange Line"}],
+        "removed": ["Blue"],
+        "modified": [{"id": "Red", "name": "Red"}],
+    }
+    assert changes["stops"] == {"added": [], "removed": [], "modified": []}
+
+
+def test_changes_combine_to_their_net_effect():
+    """
+    Ensure that a record added then removed is left out, and a record
+    removed then added back is reported as modified.
+    """
+    first = catalogue({"Red": "Red"}, {})
+    second = catalogue({"Blue": "Blue"}, {"a": "A"})
+    third = catalogue({"Red": "Red"}, {"a": "A2"})
+
+    changes = (
+        Changes.between(first, second)
+        .then(Changes.between(second, third))
+        .to_dict()
+    )
+
+    assert changes["lines"] == {
+        "added": [],
+        "removed": [],
+        "modified": [{"id": "Red", "name": "Red"}],
+    }
+    assert changes["stops"]["added"] == [{"id": "a", "name": "A2"}]
+
+
+def test_feed_changes_since_a_version():
+    feed = make_feed()
+    feed.update(catalogue({"Red": "Red"}, {}))
+    first = feed.version
+    feed.update(catalogue({"Red": "Red", "Blue": "Blue"}, {}))
+    second = feed.version
+    feed.update(catalogue({"Blue": "Blue"}, {}))
+
+    assert feed.since(first).to_dict()["lines"] == {
+        "added": [{"id": "Blue", "name": "Blue"}],
+        "removed": ["Red"],
+        "modified": [],
+    }
+    assert feed.since(second).to_dict()["lines"]["removed"] == ["Red"]
+    assert not feed.since(feed.version)
+
+
+def test_feed_ignores_unchanged_catalogues():
+    feed = make_feed()
+    feed.update(catalogue({"Red": "Red"}, {}))
+    feed.update(catalogue({"Red": "Red"}, {}))
+
+    assert feed.version == catalogue_version(catalogue({"Red": "Red"}, {}))
+    assert len(feed.history) == 0
+
+
+def test_feed_forgets_old_versions():
+    """Ensure that versions older than the kept history are unknown."""
+    feed = make_feed(max_history=1)
+    feed.update(catalogue({"Red": "Red"}, {}))
+    first = feed.version
+    feed.update(catalogue({"Blue": "Blue"}, {}))
+    second = feed.version
+    feed.update(catalogue({"Orange": "Orange"}, {}))
+
+    assert feed.since(first) is None
+    assert feed.since(second) is not None
+    assert feed.since("unknown") is None
+
+
+def test_feed_keeps_its_version_when_a_refresh_fails():
+    """
+    Ensure that a failed refresh keeps serving the catalogue already
+    fetched, and is only retried after the retry interval.
+    """
+    catalogues = [catalogue({"Red": "Red"}, {})]
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        if not catalogues:
+            raise mbta.TransportError(requests.ConnectionError("Down."))
+        return catalogues.pop()
+
+    feed = ChangeFeed(
+        fetch, refresh_interval=0, max_history=10, retry_interval=60
+    )
+    version, _ = feed.sync(None)
+
+    refreshed_version, changes = feed.sync(version)
+    assert (refreshed_version, bool(changes)) == (version, False)
+    assert feed.sync(version)[0] == version
+    assert len(calls) == 2
+
+
+def test_feed_raises_when_nothing_was_fetched():
+    def fetch():
+        raise mbta.TransportError(requests.ConnectionError("Down."))
+
+    feed = ChangeFeed(fetch, refresh_interval=0, max_history=10)
+
+    with pytest.raises(mbta.TransportError):
+        feed.sync(None)
+
+
+def test_concurrent_refreshes_record_each_change_once():
+    versions = itertools.cycle(["Red", "Blue"])
+    barrier = threading.Barrier(8)
+
+    def fetch():
+        return catalogue({next(versions): "Line"}, {})
+
+    feed = ChangeFeed(fetch, refresh_interval=60, max_history=10)
+
+    def sync():
+        barrier.wait()
+        return feed.sync(None)
+
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: sync(), range(8)))
+
+    assert len(feed.history) == 0
+    assert {version for version, _ in results} == {feed.version}
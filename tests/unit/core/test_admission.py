@@ -0,0 +1,125 @@
+import fastapi
+import pytest
+from fastapi.testclient import TestClient
+
+from gbpt_api import mbta
+from gbpt_api.core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_allows_bursts():
+    """Ensure that a full bucket admits `capacity` requests at once."""
+    bucket = TokenBucket(rate=1, capacity=3, now=0)
+
+    assert [bucket.take(0) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(0) == pytest.approx(1)
+
+
+def test_token_bucket_refills_at_rate():
+    """Ensure that tokens come back at `rate` per second."""
+    bucket = TokenBucket(rate=2, capacity=1, now=0)
+    bucket.take(0)
+
+    assert bucket.take(0.25) == pytest.approx(0.25)
+    assert bucket.take(0.5) == 0
+
+
+def test_controller_limits_clients_separately():
+    """
+    Ensure that a client over its rate does not affect other clients.
+    """
+    controller = AdmissionController(
+        rate=1, burst=1, max_concurrency=10, clock=FakeClock()
+    )
+
+    assert controller.admit("10.0.0.1") == 0
+    assert controller.admit("10.0.0.1") > 0
+    assert controller.admit("10.0.0.2") == 0
+
+
+def test_controller_forgets_least_recent_clients():
+    controller = AdmissionController(
+        rate=1, burst=1, max_concurrency=10, max_clients=2, clock=FakeClock()
+    )
+
+    for client in ("a", "b", "c"):
+        controller.admit(client)
+
+    assert list(controller._buckets) == ["b", "c"]
+
+
+def test_controller_rate_of_zero_disables_limit():
+    controller = AdmissionController(rate=0, burst=0, max_concurrency=10)
+
+    assert all(controller.admit("a") == 0 for _ in range(100))
+
+
+def make_test_client(controller: AdmissionController) -> TestClient:
+    app = fastapi.FastAPI()
+    response_cache = mbta.ResponseCache(max_entries=10)
+
+    @app.get("/cached")
+    async def cached():
+        key = mbta.Client()._cache_key("cached")
+        response_cache.set(key, mbta.CacheEntry({"data": "cached"}))
+        return mbta.Client(response_cache=response_cache)._make_request(
+            "GET", "cached"
+        )
+
+    @app.get("/uncached")
+    async def uncached():
+        return mbta.Client(response_cache=response_cache)._make_request(
+            "GET", "uncached"
+        )
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return TestClient(app)
+
+
+def test_middleware_rate_limits_with_retry_after():
+    controller = AdmissionController(
+        rate=0.5, burst=1, max_concurrency=10, clock=FakeClock()
+    )
+    test_client = make_test_client(controller)
+    controller.admit("testclient")
+
+    response = test_client.get("/cached")
+
+    assert response.status_code == fastapi.status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_middleware_serves_cache_when_saturated():
+    """
+    Ensure that once saturated, requests are answered from the cache
+    without calling the MBTA API.
+    """
+    controller = AdmissionController(rate=0, burst=0, max_concurrency=0)
+    test_client = make_test_client(controller)
+
+    response = test_client.get("/cached")
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.json() == {"data": "cached"}
+
+
+def test_middleware_sheds_uncached_requests_when_saturated():
+    controller = AdmissionController(rate=0, burst=0, max_concurrency=0)
+    test_client = make_test_client(controller)
+
+    response = test_client.get("/uncached")
+
+    assert response.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert controller.in_flight == 0
@@ -0,0 +1,28 @@
+import asyncio
+import contextvars
+import threading
+
+from gbpt_api.core.concurrency import blocking
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+
+def test_blocking_routes_run_off_the_event_loop():
+    """
+    Ensure that blocking routes run on a worker thread, in the context
+    of the request.
+    """
+
+    @blocking
+    def route(greeting: str) -> tuple[str, str, int]:
+        return greeting, request_id.get(), threading.get_ident()
+
+    async def handle():
+        request_id.set("abc")
+        return await route(greeting="hello")
+
+    loop_thread = threading.get_ident()
+    greeting, seen_id, thread = asyncio.run(handle())
+
+    assert (greeting, seen_id) == ("hello", "abc")
+    assert thread != loop_thread
@@ -0,0 +1,128 @@
+import logging
+import logging.handlers
+import threading
+
+import pytest
+
+from gbpt_api.core import timing
+from gbpt_api.core.logger import (
+    TimingFilter,
+    Truncated,
+    configure_logger,
+    stop_logging,
+)
+
+
+@pytest.fixture
+def root_handlers():
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    yield root
+    stop_logging()
+    root.handlers = handlers
+
+
+def test_configure_logger_moves_handlers_behind_a_queue(
+    root_handlers, tmp_path, monkeypatch
+):
+    log_path = tmp_path / "app.log"
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text(
+        f"""
+version: 1
+disable_existing_loggers: false
+handlers:
+  file:
+    class: logging.FileHandler
+    filename: {log_path}
+root:
+  level: INFO
+  handlers: [file]
+"""
+    )
+    monkeypatch.setenv("APP_LOG_CONFIG_PATH", str(config_path))
+
+    formatted_on = []
+
+    class Argument:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "Queued"
+
+    configure_logger()
+    logging.getLogger("gbpt_api.test").info("%s.", Argument())
+    stop_logging()
+
+    [handler] = root_handlers.handlers
+    assert isinstance(handler, logging.handlers.QueueHandler)
+    assert log_path.read_text() == "Queued.\n"
+    assert formatted_on != [threading.current_thread()]
+
+
+@pytest.fixture
+def uvicorn_logger():
+    logger = logging.getLogger("uvicorn.error")
+    handlers = list(logger.handlers)
+    yield logger
+    stop_logging()
+    logger.handlers = handlers
+
+
+def test_configure_logger_queues_uvicorn_handlers(
+    root_handlers, uvicorn_logger
+):
+    """
+    Ensure that uvicorn's handlers, which it configures itself, are also
+    moved behind a queue, and only once however often logging is
+    configured.
+    """
+    handler = logging.NullHandler()
+    uvicorn_logger.handlers = [handler]
+
+    configure_logger()
+    configure_logger()
+
+    [queue_handler] = uvicorn_logger.handlers
+    assert isinstance(queue_handler, logging.handlers.QueueHandler)
+    assert queue_handler.targets == [handler]
+
+    stop_logging()
+    configure_logger()
+
+    assert uvicorn_logger.handlers[0].targets == [handler]
+
+
+def test_timing_filter_attaches_request_timings():
+    record = logging.makeLogRecord({})
+    TimingFilter().filter(record)
+    assert record.timings == {}
+
+    with timing.collect() as timings:
+        timings.add("mbta.send", 0.5)
+        TimingFilter().filter(record)
+
+    assert record.timings == {"mbta.send": 0.5}
+
+
+def test_truncated_serializes_lazily():
+    assert str(Truncated({"id": "Red"}, max_chars=100)) == '{"id": "Red"}'
+    assert str(Truncated({"id": "Red"}, max_chars=5)) == (
+        '{"id"... (truncated)'
+    )
+
+
+def test_truncated_stops_serializing_at_max_chars():
+    serialized = []
+
+    class Item:
+        def __init__(self, index):
+            self.index = index
+
+        def __str__(self):
+            serialized.append(self.index)
+            return "x" * 10
+
+    text = str(Truncated([Item(i) for i in range(1000)], max_chars=50))
+
+    assert text.endswith("... (truncated)")
+    assert len(serialized) < 10
@@ -0,0 +1,219 @@
+import asyncio
+import pstats
+import threading
+import time
+
+import fastapi
+import pytest
+from fastapi.testclient import TestClient
+
+from gbpt_api.core import timing
+from gbpt_api.core.concurrency import blocking
+from gbpt_api.core.profiling import Profile, ProfilingMiddleware
+
+TOKEN = "secret"
+
+
+def slow_transform():
+    time.sleep(0.02)
+
+
+def busy_on_the_event_loop():
+    time.sleep(0.02)
+
+
+def make_app(directory: str = "") -> fastapi.FastAPI:
+    app = fastapi.FastAPI()
+
+    @app.get("/lines")
+    @blocking
+    def get_lines():
+        with timing.span("mbta.send"):
+            slow_transform()
+        return [{"id": "Red"}]
+
+    app.state.release = threading.Event()
+
+    @app.get("/held")
+    @blocking
+    def get_held():
+        slow_transform()
+        app.state.release.wait(timeout=5)
+        return []
+
+    @app.get("/other")
+    async def get_other():
+        busy_on_the_event_loop()
+        return []
+
+    app.add_middleware(ProfilingMiddleware, token=TOKEN, directory=directory)
+    return app
+
+
+def make_test_client(directory: str = "") -> TestClient:
+    return TestClient(make_app(directory))
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {},
+        {"X-Profile": "pstats"},
+        {"X-Profile": "pstats", "X-Profile-Token": "x"},
+    ],
+)
+def test_unauthorized_requests_are_not_profiled(headers):
+    response = make_test_client().get("/lines", headers=headers)
+
+    assert response.json() == [{"id": "Red"}]
+    assert "Server-Timing" not in response.headers
+
+
+def test_pstats_profile_is_returned():
+    response = make_test_client().get(
+        "/lines", headers={"X-Profile": "pstats", "X-Profile-Token": TOKEN}
+    )
+
+    assert response.status_code == fastapi.status.HTTP_200_OK
+    assert response.headers["X-Profile-Status"] == "200"
+    assert "slow_transform" in response.text
+    assert response.headers["Server-Timing"].startswith("mbta.send;dur=")
+
+
+def test_collapsed_profile_is_returned():
+    response = make_test_client().get(
+        "/lines", headers={"X-Profile": "collapsed", "X-Profile-Token": TOKEN}
+    )
+
+    assert "test_profiling:slow_transform" in response.text
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_unknown_profile_mode():
+    response = make_test_client().get(
+        "/lines", headers={"X-Profile": "flame", "X-Profile-Token": TOKEN}
+    )
+
+    assert response.status_code == fastapi.status.HTTP_400_BAD_REQUEST
+
+
+def test_profile_is_stored(tmp_path):
+    response = make_test_client(str(tmp_path / "profiles")).get(
+        "/lines", headers={"X-Profile": "pstats", "X-Profile-Token": TOKEN}
+    )
+
+    assert response.json() == [{"id": "Red"}]
+    path = response.headers["X-Profile-Path"]
+    assert path.startswith(str(tmp_path / "profiles"))
+    assert path.endswith("lines.prof")
+
+
+def test_spans_are_not_recorded_outside_collect():
+    with timing.span("ignored"):
+        pass
+
+    with timing.collect() as timings:
+        with timing.span("mbta.decode"):
+            pass
+        with timing.span("mbta.decode"):
+            pass
+
+    assert list(timings.totals()) == ["mbta.decode"]
+    assert len(timings.spans) == 2
+
+
+def test_nested_spans_are_recorded_in_every_collect():
+    with timing.collect() as outer:
+        with timing.collect() as inner:
+            with timing.span("mbta.send"):
+                pass
+
+    assert list(inner.totals()) == ["mbta.send"]
+    assert list(outer.totals()) == ["mbta.send"]
+
+
+async def call(app, path, headers={}) -> bytes:
+    """Send a GET request straight to an ASGI app, returning the body."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "scheme": "http",
+        "server": ("test", 80),
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in headers.items()
+        ],
+    }
+    received: list[bool] = []
+    body: list[bytes] = []
+
+    async def receive():
+        if received:
+            # Stay connected until the response is sent.
+            await asyncio.Event().wait()
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [
+        pytest.param(
+            "pstats",
+            marks=pytest.mark.skipif(
+                Profile.PROFILES_EVERY_THREAD,
+                reason="Profilers record every thread from Python 3.12.",
+            ),
+        ),
+        "collapsed",
+    ],
+)
+def test_profile_leaves_out_other_requests(mode):
+    """
+    Ensure that requests interleaved with a profiled one on the event
+    loop are neither held back nor part of its profile.
+    """
+    app = make_app()
+    headers = {"X-Profile": mode, "X-Profile-Token": TOKEN}
+
+    async def run():
+        profiled = asyncio.create_task(call(app, "/held", headers))
+        await asyncio.sleep(0.005)
+        other = await call(app, "/other")
+        assert not profiled.done()
+        app.state.release.set()
+        return (await profiled).decode(), other
+
+    report, other = asyncio.run(run())
+
+    assert other == b"[]"
+    assert "slow_transform" in report
+    assert "busy_on_the_event_loop" not in report
+
+
+def test_concurrent_profiles_are_not_taken(tmp_path):
+    app = make_app(str(tmp_path))
+    headers = {"X-Profile": "pstats", "X-Profile-Token": TOKEN}
+
+    async def run():
+        return await asyncio.gather(
+            call(app, "/lines", headers), call(app, "/lines", headers)
+        )
+
+    asyncio.run(run())
+
+    [path] = tmp_path.iterdir()
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "slow_transform" in functions
@@ -0,0 +1,143 @@
+import pytest
+import requests_mock
+
+from gbpt_api import gtfs_realtime
+
+gtfs_realtime_pb2 = pytest.importorskip("google.transit.gtfs_realtime_pb2")
+
+FEED_URL = "https://cdn.mbta.com/realtime/VehiclePositions.pb"
+
+
+def make_feed(
+    *vehicles: tuple[str, str, str, int],
+    deleted: tuple[str, ...] = (),
+    differential: bool = False,
+) -> bytes:
+    """Encode a VehiclePositions feed of (id, route, stop, timestamp)."""
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1_700_000_000
+    if differential:
+        message.header.incrementality = message.header.DIFFERENTIAL
+
+    for id, route_id, stop_id, timestamp in vehicles:
+        entity = message.entity.add(id=id)
+        entity.vehicle.vehicle.id = id
+        entity.vehicle.vehicle.label = f"label-{id}"
+        entity.vehicle.trip.route_id = route_id
+        entity.vehicle.trip.trip_id = f"trip-{id}"
+        entity.vehicle.stop_id = stop_id
+        entity.vehicle.current_status = entity.vehicle.STOPPED_AT
+        entity.vehicle.position.latitude = 42.37
+        entity.vehicle.position.longitude = -71.12
+        entity.vehicle.timestamp = timestamp
+    for id in deleted:
+        message.entity.add(id=id, is_deleted=True)
+
+    return message.SerializeToString()
+
+
+def apply(state: gtfs_realtime.VehicleState, data: bytes) -> int:
+    return state.apply(gtfs_realtime.parse_feed(data))
+
+
+def test_vehicles_are_indexed_by_route_and_stop():
+    state = gtfs_realtime.VehicleState()
+
+    apply(
+        state,
+        make_feed(
+            ("R-1", "Red", "70061", 1),
+            ("R-2", "Red", "70063", 1),
+            ("O-1", "Orange", "70061", 1),
+        ),
+    )
+
+    assert [v.id for v in state.on_route("Red")] == ["R-1", "R-2"]
+    assert [v.id for v in state.on_route("Red", stop_ids=["70061"])] == ["R-1"]
+    assert state.on_route("Blue") == []
+    assert state.on_route("Red")[0].to_dict() == {
+        "id": "R-1",
+        "label": "label-R-1",
+        "trip_id": "trip-R-1",
+        "direction_id": 0,
+        "stop_id": "70061",
+        "status": "stopped_at",
+        "latitude": pytest.approx(42.37),
+        "longitude": pytest.approx(-71.12),
+        "bearing": 0,
+        "updated_at": 1,
+    }
+
+
+def test_full_datasets_replace_every_vehicle():
+    """
+    Ensure that vehicles left out of a full dataset are removed, and
+    only vehicles with a new position count as changed.
+    """
+    state = gtfs_realtime.VehicleState()
+    apply(state, make_feed(("R-1", "Red", "a", 1), ("R-2", "Red", "b", 1)))
+
+    changed = apply(
+        state, make_feed(("R-1", "Red", "a", 1), ("R-3", "Red", "c", 2))
+    )
+
+    assert changed == 2
+    assert [v.id for v in state.on_route("Red")] == ["R-1", "R-3"]
+
+
+def test_differential_feeds_update_what_they_mention():
+    state = gtfs_realtime.VehicleState()
+    apply(state, make_feed(("R-1", "Red", "a", 1), ("R-2", "Red", "b", 1)))
+
+    apply(
+        state,
+        make_feed(("R-1", "Red", "b", 2), deleted=("R-2",), differential=True),
+    )
+
+    [vehicle] = state.on_route("Red")
+    assert (vehicle.id, vehicle.stop_id) == ("R-1", "b")
+    assert state.on_route("Red", stop_ids=["a"]) == []
+
+
+def test_invalid_feeds_raise_value_errors():
+    with pytest.raises(ValueError):
+        gtfs_realtime.parse_feed(b"not a feed")
+
+
+def test_file_source_is_only_read_once_modified(tmp_path):
+    path = tmp_path / "VehiclePositions.pb"
+    path.write_bytes(make_feed(("R-1", "Red", "a", 1)))
+    source = gtfs_realtime.FeedSource(str(path), timeout=1)
+
+    assert source.read() is not None
+    assert source.read() is None
+
+
+def test_url_source_is_fetched_conditionally():
+    source = gtfs_realtime.FeedSource(FEED_URL, timeout=1)
+    feed = make_feed(("R-1", "Red", "a", 1))
+
+    with requests_mock.Mocker() as mock:
+        mock.get(FEED_URL, content=feed, headers={"ETag": '"v1"'})
+        assert source.read() == feed
+        assert "If-None-Match" not in mock.last_request.headers
+
+        mock.get(FEED_URL, status_code=304)
+        assert source.read() is None
+        assert mock.last_request.headers["If-None-Match"] == '"v1"'
+        assert "If-Modified-Since" not in mock.last_request.headers
+
+
+def test_poller_applies_changed_feeds(tmp_path):
+    path = tmp_path / "VehiclePositions.pb"
+    path.write_bytes(make_feed(("R-1", "Red", "a", 1)))
+    state = gtfs_realtime.VehicleState()
+    poller = gtfs_realtime.FeedPoller(
+        gtfs_realtime.FeedSource(str(path), timeout=1), state, interval=60
+    )
+
+    assert poller.poll()
+    assert not poller.poll()
+    assert state.loaded
+    assert len(state) == 1
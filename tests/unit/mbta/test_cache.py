@@ -0,0 +1,176 @@
+import pytest
+import requests_mock
+
+from gbpt_api import mbta
+
+ROUTES = {
+    "data": [{"attributes": {"long_name": "Red Line", "type": 1}, "id": "Red"}]
+}
+
+
+@pytest.fixture
+def client() -> mbta.Client:
+    return mbta.Client(
+        response_cache=mbta.ResponseCache(max_entries=10), fresh_for=0
+    )
+
+
+def test_client_revalidates_cached_responses(client):
+    """
+    Ensure that a cached response is revalidated with its validators and
+    reused when the MBTA API answers 304 Not Modified.
+    """
+    with requests_mock.Mocker() as mock:
+        mock.get(
+            f"{client.API_URI}/routes",
+            [
+                {
+                    "json": ROUTES,
+                    "headers": {
+                        "Last-Modified": "Tue, 23 Aug 2022 12:00:00 GMT",
+                        "ETag": '"abc"',
+                    },
+                },
+                {"status_code": 304},
+            ],
+        )
+        first = client.list_routes()
+        second = client.list_routes()
+
+    assert first == second == [mbta.Route("Red", "Red Line", 1)]
+    assert mock.last_request.headers["If-Modified-Since"] == (
+        "Tue, 23 Aug 2022 12:00:00 GMT"
+    )
+    assert mock.last_request.headers["If-None-Match"] == '"abc"'
+
+
+def test_client_serves_fresh_responses_without_calling():
+    client = mbta.Client(
+        response_cache=mbta.ResponseCache(max_entries=10), fresh_for=60
+    )
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{client.API_URI}/routes", json=ROUTES)
+        client.list_routes()
+        routes = client.list_routes()
+
+    assert routes == [mbta.Route("Red", "Red Line", 1)]
+    assert mock.call_count == 1
+
+
+def test_client_parses_cached_responses_once():
+    """
+    Ensure that cache hits reuse the models parsed from the response,
+    and that the response is cached without its links.
+    """
+    response_cache = mbta.ResponseCache(max_entries=10)
+    client = mbta.Client(response_cache=response_cache, fresh_for=60)
+    routes = {"data": [{**ROUTES["data"][0], "links": {"self": "/routes"}}]}
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{client.API_URI}/routes", json=routes)
+        first = client.list_routes()
+        second = client.list_routes()
+
+    assert first[0] is second[0]
+    [key] = response_cache.keys()
+    assert "links" not in response_cache.get(key).data["data"][0]
+
+
+def test_cache_key_leaves_out_api_key(client, monkeypatch):
+    monkeypatch.setattr(client, "API_KEY", "secret")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{client.API_URI}/stops", json={"data": []})
+        client.list_stops(route_ids=["Red", "Orange"])
+
+    assert client.response_cache.keys() == ["stops?route=Red%2COrange"]
+    assert mock.last_request.qs["api_key"] == ["secret"]
+
+
+def test_client_serves_cache_only_without_calling(client):
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{client.API_URI}/routes", json=ROUTES)
+        client.list_routes()
+
+        token = mbta.cache_only.set(True)
+        try:
+            routes = client.list_routes()
+        finally:
+            mbta.cache_only.reset(token)
+
+    assert routes == [mbta.Route("Red", "Red Line", 1)]
+    assert mock.call_count == 1
+
+
+def test_client_cache_only_miss_raises(client):
+    token = mbta.cache_only.set(True)
+    try:
+        with pytest.raises(mbta.SaturatedError):
+            client.list_routes()
+    finally:
+        mbta.cache_only.reset(token)
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = mbta.ResponseCache(max_entries=2)
+    cache.set("a", mbta.CacheEntry({}))
+    cache.set("b", mbta.CacheEntry({}))
+    cache.get("a")
+
+    cache.set("c", mbta.CacheEntry({}))
+
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_response_cache_round_trips_through_a_file(tmp_path):
+    cache = mbta.ResponseCache(max_entries=10)
+    cache.set("routes", mbta.CacheEntry(ROUTES, "yesterday", '"abc"', 1.0))
+    path = tmp_path / "cache" / "mbta.json"
+
+    assert cache.dump(path) == 1
+
+    restored = mbta.ResponseCache(max_entries=10)
+    assert restored.load(path) == 1
+    entry = restored.get("routes")
+    assert (entry.data, entry.last_modified, entry.etag, entry.stored_at) == (
+        ROUTES,
+        "yesterday",
+        '"abc"',
+        1.0,
+    )
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        None,
+        "{not json",
+        '{"version": 0}',
+        "[]",
+        '{"version": 1}',
+        '{"version": 1, "entries": [{"key": "routes"}]}',
+        '{"version": 1, "entries": 1}',
+    ],
+)
+def test_response_cache_ignores_unusable_files(tmp_path, contents):
+    path = tmp_path / "mbta.json"
+    if contents is not None:
+        path.write_text(contents)
+
+    assert mbta.ResponseCache(max_entries=10).load(path) == 0
+
+
+def test_response_cache_ignores_files_it_cannot_read(tmp_path):
+    assert mbta.ResponseCache(max_entries=10).load(tmp_path) == 0
+
+
+def test_response_cache_leaves_no_temporary_files(tmp_path):
+    cache = mbta.ResponseCache(max_entries=10)
+    cache.set("routes", mbta.CacheEntry(ROUTES))
+
+    cache.dump(tmp_path / "mbta.json")
+    cache.dump(tmp_path / "mbta.json")
+
+    assert [path.name for path in tmp_path.iterdir()] == ["mbta.json"]
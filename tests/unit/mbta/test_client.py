@@ -1,3 +1,6 @@
+import logging
+import sys
+
 import pytest
 import requests_mock
 from schema import And, Or, Schema  # type: ignore
@@ -7,61 +10,36 @@ from gbpt_api import mbta
 route_schema = Schema(
     {
         "id": And(str, lambda id: len(id) > 0),
-        "attributes": {
-            "color": str,
-            "description": str,
-            "direction_destinations": list,
-            "direction_names": list,
-            "fare_class": str,
-            "long_name": str,
-            "short_name": str,
-            "sort_order": int,
-            "text_color": And(str, lambda hex: len(hex) == 6),
-            "type": int,
-        },
-        "links": dict,
-        "relationships": dict,
-        "type": "route",
+        "name": str,
+        "type": int,
     }
 )
 
 stop_schema = Schema(
     {
         "id": And(str, lambda id: len(id) > 0),
-        "attributes": {
-            "address": Or(None, str),
-            "at_street": Or(None, str),
-            "description": Or(None, str),
-            "latitude": Or(None, float),
-            "location_type": int,
-            "longitude": Or(None, float),
-            "municipality": str,
-            "name": str,
-            "on_street": Or(None, str),
-            "platform_code": Or(None, str),
-            "platform_name": Or(None, str),
-            "vehicle_type": Or(None, int),
-            "wheelchair_boarding": int,
-        },
-        "links": dict,
-        "relationships": dict,
-        "type": "stop",
+        "name": str,
+        "parent_station_id": Or(None, And(str, lambda id: len(id) > 0)),
     }
 )
 
 
+def as_dict(model: mbta.Route | mbta.Stop) -> dict:
+    return {field: getattr(model, field) for field in model.__slots__}
+
+
 @pytest.mark.vcr
 def test_list_routes_schema():
     """
-    Ensure that a MBTA GET /routes response has the expected
-    schema.
+    Ensure that a MBTA GET /routes response is parsed into routes
+    with the expected schema.
     """
     client = mbta.Client()
 
     response = client.list_routes()
 
     for route in response:
-        assert route_schema.validate(route)
+        assert route_schema.validate(as_dict(route))
 
 
 @pytest.mark.vcr
@@ -75,22 +53,22 @@ def test_list_routes_with_type_query_param():
     response = client.list_routes(type=mbta.RouteType.HEAVY_RAIL)
 
     for route in response:
-        assert route_schema.validate(route)
-        assert route["attributes"]["type"] == mbta.RouteType.HEAVY_RAIL.value
+        assert route_schema.validate(as_dict(route))
+        assert route.type == mbta.RouteType.HEAVY_RAIL.value
 
 
 @pytest.mark.vcr
 def test_list_stops_schema():
     """
-    Ensure that a MBTA GET /stops response has the expected
-    schema.
+    Ensure that a MBTA GET /stops response is parsed into stops
+    with the expected schema.
     """
     client = mbta.Client()
 
     response = client.list_stops()
 
     assert isinstance(response, list)
-    assert stop_schema.validate(response[0])
+    assert stop_schema.validate(as_dict(response[0]))
 
 
 @pytest.mark.vcr
@@ -104,7 +82,7 @@ def test_list_stop_with_route_query_param():
     response = client.list_stops(route_ids="Red")
 
     for stop in response:
-        assert stop_schema.validate(stop)
+        assert stop_schema.validate(as_dict(stop))
 
 
 @pytest.mark.parametrize(
@@ -118,3 +96,54 @@ def test_4xx_code_on_response(status_code, error):
         with requests_mock.Mocker() as mock:
             mock.get(f"{client.API_URI}/routes", status_code=status_code)
             client.list_routes()
+
+
+def test_models_intern_ids():
+    """
+    Ensure that IDs are interned so that catalogues share one copy of
+    each ID.
+    """
+    stop = mbta.Stop.from_resource(
+        {
+            "attributes": {"name": "Alewife"},
+            "id": "".join(["7006", "1"]),
+            "relationships": {
+                "parent_station": {"data": {"id": "place-alfcl"}}
+            },
+        }
+    )
+
+    assert stop.id is sys.intern("70061")
+    assert stop.station_id == "place-alfcl"
+    assert not hasattr(stop, "__dict__")
+
+
+@pytest.mark.parametrize("sample_rate,logged", [(0.0, False), (1.0, True)])
+def test_response_payloads_are_sampled(
+    sample_rate, logged, caplog, monkeypatch
+):
+    """
+    Ensure that only the sampled share of responses are logged, and
+    that the API key is left out of them.
+    """
+    monkeypatch.setattr(
+        mbta.client.settings, "MBTA_PAYLOAD_LOG_SAMPLE_RATE", sample_rate
+    )
+    monkeypatch.setattr(mbta.client.settings, "MBTA_PAYLOAD_LOG_MAX_CHARS", 10)
+    caplog.set_level(logging.DEBUG, logger="gbpt_api.mbta.payloads")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(mbta.Client.API_URI + "/routes", json={"data": []})
+        mbta.Client().list_routes()
+
+    records = [
+        record
+        for record in caplog.records
+        if record.name == "gbpt_api.mbta.payloads"
+    ]
+    assert bool(records) is logged
+    if logged:
+        message = records[0].getMessage()
+        assert message.startswith("MBTA response to GET routes: ")
+        assert message.endswith("... (truncated)")
+        assert "api_key" not in message
@@ -0,0 +1,97 @@
+from gbpt_api.mbta import jsonapi
+
+DOCUMENT = {
+    "data": [
+        {
+            "id": "Red-1-0",
+            "relationships": {
+                "route": {"data": {"id": "Red", "type": "route"}},
+                "stops": {
+                    "data": [
+                        {"id": "70061", "type": "stop"},
+                        {"id": "missing", "type": "stop"},
+                        {"id": "70063", "type": "stop"},
+                    ]
+                },
+            },
+            "type": "route_pattern",
+        }
+    ],
+    "included": [
+        {"id": "Red", "type": "route"},
+        {"id": "70061", "type": "stop", "attributes": {"name": "first"}},
+        {"id": "70063", "type": "stop"},
+        {"id": "70061", "type": "stop", "attributes": {"name": "second"}},
+    ],
+}
+
+
+def test_normalize_deduplicates_included_resources():
+    """
+    Ensure that a resource included more than once is only kept once.
+    """
+    document = jsonapi.normalize(DOCUMENT)
+
+    assert len(list(document.of_type("stop"))) == 2
+    assert document.get("stop", "70061")["attributes"]["name"] == "first"
+
+
+def test_normalize_indexes_primary_data():
+    """Ensure that primary data can be looked up like included resources."""
+    document = jsonapi.normalize(DOCUMENT)
+
+    assert document.get("route_pattern", "Red-1-0") is document.data[0]
+
+
+def test_normalize_single_resource():
+    """Ensure that a document with a single primary resource is a list."""
+    document = jsonapi.normalize({"data": {"id": "Red", "type": "route"}})
+
+    assert document.data == [{"id": "Red", "type": "route"}]
+
+
+def test_related_follows_to_one_and_to_many_relationships():
+    """
+    Ensure that relationships resolve to included resources, in order,
+    skipping resources that were not included.
+    """
+    document = jsonapi.normalize(DOCUMENT)
+    pattern = document.data[0]
+
+    assert document.related(pattern, "route") == [
+        {"id": "Red", "type": "route"}
+    ]
+    assert [stop["id"] for stop in document.related(pattern, "stops")] == [
+        "70061",
+        "70063",
+    ]
+    assert document.related(pattern, "representative_trip") == []
+
+
+def test_trim_keeps_only_what_is_read():
+    document = {
+        "data": [
+            {
+                "attributes": {"name": "Alewife"},
+                "id": "place-alfcl",
+                "links": {"self": "/stops/place-alfcl"},
+                "relationships": {
+                    "parent_station": {"data": None, "links": {}}
+                },
+                "type": "stop",
+            }
+        ],
+        "jsonapi": {"version": "1.0"},
+        "links": {"next": "/stops?page=2"},
+    }
+
+    assert jsonapi.trim(document) == {
+        "data": [
+            {
+                "attributes": {"name": "Alewife"},
+                "id": "place-alfcl",
+                "relationships": {"parent_station": {"data": None}},
+                "type": "stop",
+            }
+        ]
+    }
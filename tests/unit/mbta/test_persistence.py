@@ -0,0 +1,83 @@
+import time
+
+import requests_mock
+
+from gbpt_api import mbta
+
+ROUTES = {
+    "data": [{"attributes": {"long_name": "Red Line", "type": 1}, "id": "Red"}]
+}
+
+
+def test_restored_responses_are_revalidated_in_the_background(tmp_path):
+    """
+    Ensure that restored responses are served right away and revalidated
+    once the persister starts.
+    """
+    path = tmp_path / "mbta.json"
+    saved = mbta.ResponseCache(max_entries=10)
+    saved.set("routes", mbta.CacheEntry(ROUTES, "yesterday", stored_at=0))
+    saved.dump(path)
+
+    response_cache = mbta.ResponseCache(max_entries=10)
+    persister = mbta.CachePersister(response_cache, path, save_interval=60)
+    assert persister.restore() == 1
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{mbta.Client.API_URI}/routes", status_code=304)
+        persister.start()
+        deadline = time.monotonic() + 5
+        while not mock.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        persister.stop()
+
+    assert mock.call_count == 1
+    assert mock.last_request.headers["If-Modified-Since"] == "yesterday"
+    assert response_cache.get("routes").stored_at > 0
+
+
+def test_cache_is_saved_on_stop(tmp_path):
+    path = tmp_path / "mbta.json"
+    response_cache = mbta.ResponseCache(max_entries=10)
+    persister = mbta.CachePersister(response_cache, path, save_interval=60)
+    persister.restore()
+    persister.start()
+
+    response_cache.set("routes", mbta.CacheEntry(ROUTES))
+    persister.stop()
+
+    assert mbta.ResponseCache(max_entries=10).load(path) == 1
+
+
+def test_restored_responses_are_served_until_revalidated(tmp_path):
+    path = tmp_path / "mbta.json"
+    saved = mbta.ResponseCache(max_entries=10)
+    saved.set("routes", mbta.CacheEntry(ROUTES, stored_at=0))
+    saved.dump(path)
+
+    response_cache = mbta.ResponseCache(max_entries=10)
+    mbta.CachePersister(response_cache, path, save_interval=60).restore()
+    client = mbta.Client(response_cache=response_cache)
+
+    with requests_mock.Mocker() as mock:
+        routes = client.list_routes()
+
+    assert [route.id for route in routes] == ["Red"]
+    assert not mock.called
+
+
+def test_responses_that_fail_to_revalidate_are_no_longer_served(tmp_path):
+    path = tmp_path / "mbta.json"
+    saved = mbta.ResponseCache(max_entries=10)
+    saved.set("routes", mbta.CacheEntry(ROUTES, stored_at=0))
+    saved.dump(path)
+
+    response_cache = mbta.ResponseCache(max_entries=10)
+    persister = mbta.CachePersister(response_cache, path, save_interval=60)
+    persister.restore()
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{mbta.Client.API_URI}/routes", status_code=404)
+        persister._revalidate(["routes"])
+
+    assert not response_cache.get("routes").restored
@@ -0,0 +1,219 @@
+import threading
+
+import pytest
+import requests
+import requests_mock
+
+from gbpt_api import mbta
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_api_error(status_code: int, headers: dict | None = None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return mbta.errors.get_api_error(response)
+
+
+def test_backoff_is_capped():
+    """Ensure that backoff delays never exceed the configured maximum."""
+    policy = mbta.RetryPolicy(max_retries=10, backoff_base=1, backoff_max=3)
+
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt) <= 3
+
+
+@pytest.mark.parametrize("status_code", [500, 503])
+def test_server_errors_are_retried(status_code):
+    """Ensure that 5xx errors are retried until retries run out."""
+    policy = mbta.RetryPolicy(max_retries=2, backoff_base=1, backoff_max=3)
+    error = make_api_error(status_code)
+
+    assert policy.delay(error, 0) is not None
+    assert policy.delay(error, 1) is not None
+    assert policy.delay(error, 2) is None
+
+
+def test_client_errors_are_not_retried():
+    """Ensure that a 4xx error other than a 429 is never retried."""
+    policy = mbta.RetryPolicy(max_retries=2, backoff_base=1, backoff_max=3)
+
+    assert policy.delay(make_api_error(400), 0) is None
+
+
+def test_rate_limit_waits_for_reset():
+    """
+    Ensure that a rate limited call is not retried before the rate limit
+    resets.
+    """
+    clock = FakeClock(100.0)
+    policy = mbta.RetryPolicy(
+        max_retries=2, backoff_base=0.1, backoff_max=5, clock=clock
+    )
+    error = make_api_error(429, {"x-ratelimit-reset": "102"})
+
+    assert policy.delay(error, 0) == pytest.approx(2.0)
+
+
+def test_rate_limit_reset_too_far_away_is_not_retried():
+    """
+    Ensure that we give up rather than wait longer than the maximum backoff
+    for the rate limit to reset.
+    """
+    clock = FakeClock(100.0)
+    policy = mbta.RetryPolicy(
+        max_retries=2, backoff_base=0.1, backoff_max=5, clock=clock
+    )
+    error = make_api_error(429, {"x-ratelimit-reset": "160"})
+
+    assert policy.delay(error, 0) is None
+
+
+def test_circuit_breaker_opens_after_threshold():
+    """
+    Ensure that the breaker rejects calls once it has seen enough
+    consecutive failures.
+    """
+    breaker = mbta.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+
+    assert breaker.state == breaker.OPEN
+    with pytest.raises(mbta.CircuitOpenError):
+        breaker.before_request()
+
+
+def test_circuit_breaker_success_resets_failures():
+    """Ensure that only consecutive failures count toward opening."""
+    breaker = mbta.CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == breaker.CLOSED
+
+
+def test_circuit_breaker_half_opens_after_timeout():
+    """
+    Ensure that a single trial call goes through once the reset timeout
+    has passed and that its outcome decides the breaker's state.
+    """
+    clock = FakeClock()
+    breaker = mbta.CircuitBreaker(
+        failure_threshold=1, reset_timeout=10, clock=clock
+    )
+    breaker.record_failure()
+
+    clock.now = 10
+    breaker.before_request()
+    assert breaker.state == breaker.HALF_OPEN
+    with pytest.raises(mbta.CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+
+    clock.now = 20
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+
+
+def make_client(
+    max_retries: int = 2, failure_threshold: int = 5, **kwargs
+) -> mbta.Client:
+    return mbta.Client(
+        retry_policy=mbta.RetryPolicy(
+            max_retries=max_retries, backoff_base=0, backoff_max=0
+        ),
+        circuit_breaker=mbta.CircuitBreaker(
+            failure_threshold=failure_threshold, reset_timeout=60
+        ),
+        **kwargs,
+    )
+
+
+def test_client_retries_server_errors():
+    """Ensure that the client retries a call that failed with a 5xx."""
+    client = make_client()
+
+    with requests_mock.Mocker() as mock:
+        mock.get(
+            f"{client.API_URI}/routes",
+            [{"status_code": 503}, {"json": {"data": []}}],
+        )
+        response = client.list_routes()
+
+    assert response == []
+    assert mock.call_count == 2
+
+
+def test_client_retries_timeouts():
+    """
+    Ensure that a timed out call is retried and raised as a TransportError
+    once retries run out.
+    """
+    client = make_client()
+
+    with pytest.raises(mbta.TransportError):
+        with requests_mock.Mocker() as mock:
+            mock.get(f"{client.API_URI}/routes", exc=requests.Timeout)
+            client.list_routes()
+
+    assert mock.call_count == 3
+
+
+def test_client_fails_fast_when_circuit_is_open():
+    """
+    Ensure that once the breaker is open, the client does not call the
+    MBTA API at all.
+    """
+    client = make_client(max_retries=0, failure_threshold=1)
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{client.API_URI}/routes", status_code=500)
+        with pytest.raises(mbta.APIError):
+            client.list_routes()
+        with pytest.raises(mbta.CircuitOpenError):
+            client.list_routes()
+
+    assert mock.call_count == 1
+
+
+def test_client_hedges_slow_calls(monkeypatch):
+    """
+    Ensure that a slow call is duplicated and the fastest response is used.
+    """
+    client = make_client(hedge_after=0.01)
+    release = threading.Event()
+    calls = []
+
+    def slow_first_request(method, uri, headers):
+        calls.append(uri)
+        if len(calls) == 1:
+            release.wait(timeout=5)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"data": []}'
+        return response
+
+    monkeypatch.setattr(client, "_request", slow_first_request)
+    hedge_wins = mbta.counters.get("mbta.hedge_wins")
+
+    try:
+        assert client.list_routes() == []
+    finally:
+        release.set()
+
+    assert len(calls) == 2
+    assert mbta.counters.get("mbta.hedge_wins") == hedge_wins + 1
@@ -0,0 +1,238 @@
+import asyncio
+import http.server
+import json
+import threading
+
+import pytest
+
+from gbpt_api import mbta
+from gbpt_api.mbta.streaming import ResourceState, parse_events
+
+UPSTREAM_EVENTS = [
+    mbta.Event("reset", json.dumps([{"id": "y1808"}, {"id": "y1809"}])),
+    mbta.Event("add", json.dumps({"id": "y1810"})),
+    mbta.Event("update", json.dumps({"id": "y1808", "bearing": 90})),
+    mbta.Event("remove", json.dumps({"id": "y1809"})),
+]
+
+
+class FakeSSEServer:
+    """A local stand-in for the MBTA API's event streams."""
+
+    def __init__(self, events: list[mbta.Event]) -> None:
+        self.connections = 0
+        self.done = threading.Event()
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.connections += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.write_chunk(b": keep-alive\n\n")
+                for event in events:
+                    self.write_chunk(event.encode())
+                fake.done.wait(timeout=5)
+
+            def write_chunk(self, chunk: bytes) -> None:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.uri = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self) -> "FakeSSEServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.done.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_parse_events():
+    """
+    Ensure that events are split on blank lines, multi-line data is joined
+    and comments are skipped.
+    """
+    lines = [
+        ": keep-alive",
+        "",
+        "event: add",
+        "data: {",
+        'data: "id": "y1808"}',
+        "",
+        "event: remove",
+        'data:{"id": "y1808"}',
+        "",
+    ]
+
+    assert list(parse_events(lines)) == [
+        mbta.Event("add", '{\n"id": "y1808"}'),
+        mbta.Event("remove", '{"id": "y1808"}'),
+    ]
+
+
+def test_event_encode_round_trips():
+    """Ensure that an encoded event parses back to the same event."""
+    event = mbta.Event("update", "line one\nline two")
+
+    lines = event.encode().decode().split("\n")
+
+    assert list(parse_events(lines)) == [event]
+
+
+def test_resource_state_applies_incremental_events():
+    """
+    Ensure that reset, add, update and remove events are applied to the
+    state.
+    """
+    state = ResourceState()
+
+    for event in UPSTREAM_EVENTS:
+        state.apply(event)
+
+    assert state.resources == {
+        "y1808": {"id": "y1808", "bearing": 90},
+        "y1810": {"id": "y1810"},
+    }
+
+
+def test_snapshot_is_encoded_once_per_change():
+    """
+    Ensure that snapshots are shared until the state changes, and then
+    describe the new state.
+    """
+    state = ResourceState()
+    for event in UPSTREAM_EVENTS:
+        state.apply(event)
+
+    snapshot = state.snapshot()
+    assert state.snapshot() is snapshot
+
+    state.apply(mbta.Event("remove", '{"id": "y1810"}'))
+
+    assert state.snapshot() is not snapshot
+    assert json.loads(state.snapshot().data) == [{"id": "y1808", "bearing": 90}]
+
+
+@pytest.fixture
+def fake_sse_server(monkeypatch):
+    with FakeSSEServer(UPSTREAM_EVENTS) as server:
+        monkeypatch.setattr(mbta.Client, "API_URI", server.uri)
+        yield server
+
+
+async def collect_state(subscription: mbta.Subscription) -> dict:
+    state = ResourceState()
+    while set(state.resources) != {"y1808", "y1810"}:
+        state.apply(await asyncio.wait_for(subscription.get(), timeout=5))
+    return state.resources
+
+
+def test_hub_shares_one_upstream_connection(fake_sse_server):
+    """
+    Ensure that every subscriber to a topic is served by a single upstream
+    connection and sees the same state.
+    """
+    hub = mbta.StreamHub(
+        retry_policy=mbta.RetryPolicy(
+            max_retries=0, backoff_base=0.1, backoff_max=0.1
+        )
+    )
+
+    async def subscribe_many():
+        loop = asyncio.get_running_loop()
+        subscriptions = [
+            hub.subscribe(
+                ("vehicles", "Red"),
+                lambda: mbta.Client().stream_vehicles(route_ids="Red"),
+                loop,
+            )
+            for _ in range(5)
+        ]
+        states = await asyncio.gather(*map(collect_state, subscriptions))
+        for subscription in subscriptions:
+            subscription.close()
+        return states
+
+    try:
+        states = asyncio.run(subscribe_many())
+    finally:
+        hub.close()
+
+    assert fake_sse_server.connections == 1
+    assert all(state == states[0] for state in states)
+    assert hub.topics() == []
+
+
+def test_slow_subscriber_is_resynced():
+    """
+    Ensure that a subscriber whose backlog is full gets a single reset
+    event with the current state instead of the backlog.
+    """
+
+    async def overflow():
+        hub = mbta.StreamHub(
+            retry_policy=mbta.RetryPolicy(
+                max_retries=0, backoff_base=60, backoff_max=60
+            ),
+            max_backlog=2,
+        )
+
+        def fail():
+            raise mbta.MBTAError(message="offline")
+
+        subscription = hub.subscribe("key", fail, asyncio.get_running_loop())
+        topic = subscription._topic
+        for event in UPSTREAM_EVENTS:
+            topic.publish(event)
+        await asyncio.sleep(0)
+
+        first = await subscription.get()
+        subscription.close()
+        hub.close()
+        return first
+
+    event = asyncio.run(overflow())
+
+    assert event.event == "reset"
+    assert {resource["id"] for resource in json.loads(event.data)} == {
+        "y1808",
+        "y1810",
+    }
+
+
+def test_hub_caps_open_topics():
+    async def subscribe_past_cap():
+        hub = mbta.StreamHub(
+            retry_policy=mbta.RetryPolicy(
+                max_retries=0, backoff_base=60, backoff_max=60
+            ),
+            max_topics=1,
+        )
+
+        def fail():
+            raise mbta.MBTAError(message="offline")
+
+        loop = asyncio.get_running_loop()
+        first = hub.subscribe("Red", fail, loop)
+        second = hub.subscribe("Red", fail, loop)
+        try:
+            with pytest.raises(mbta.TooManyTopicsError):
+                hub.subscribe("Orange", fail, loop)
+        finally:
+            first.close()
+            second.close()
+            hub.close()
+
+    asyncio.run(subscribe_past_cap())
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from gbpt_api import mbta
+from gbpt_api.core import timing
+
+httpx = pytest.importorskip("httpx")
+
+
+def make_client(handler, **kwargs) -> mbta.Client:
+    """A client sending calls over HTTP/2 to `handler` instead."""
+    return mbta.Client(
+        retry_policy=mbta.RetryPolicy(
+            max_retries=0, backoff_base=0, backoff_max=0
+        ),
+        circuit_breaker=mbta.CircuitBreaker(
+            failure_threshold=5, reset_timeout=60
+        ),
+        response_cache=mbta.ResponseCache(max_entries=8),
+        transport=mbta.HTTP2Transport(
+            client=httpx.Client(transport=httpx.MockTransport(handler))
+        ),
+        **kwargs,
+    )
+
+
+def test_http2_transport_lists_routes():
+    def handler(request):
+        assert request.url.path == "/routes"
+        assert request.url.params["type"] == "1"
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "attributes": {"long_name": "Red Line", "type": 1},
+                        "id": "Red",
+                        "type": "route",
+                    }
+                ]
+            },
+        )
+
+    routes = make_client(handler).list_routes(type=mbta.RouteType.HEAVY_RAIL)
+
+    assert routes == [mbta.Route("Red", "Red Line", 1)]
+
+
+def test_http2_transport_api_errors():
+    """Ensure that error responses raise the same errors as requests."""
+
+    def handler(request):
+        return httpx.Response(429, headers={"x-ratelimit-reset": "0"})
+
+    with pytest.raises(mbta.RateLimitExceededError) as exc_info:
+        make_client(handler).list_routes()
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.reason == "Too Many Requests"
+
+
+def test_http2_transport_unreachable():
+    def handler(request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    with pytest.raises(mbta.TransportError):
+        make_client(handler).list_routes()
+
+
+def test_create_unknown_transport():
+    with pytest.raises(ValueError):
+        mbta.transport.create("carrier-pigeon")
+
+
+def test_fan_out_returns_results_in_order():
+    results = mbta.fan_out([lambda: 1, lambda: 2, lambda: 3], max_concurrency=2)
+
+    assert results == [1, 2, 3]
+
+
+def test_fan_out_bounds_concurrency():
+    lock = threading.Lock()
+    running, most_running = 0, 0
+
+    def call():
+        nonlocal running, most_running
+        with lock:
+            running += 1
+            most_running = max(most_running, running)
+        threading.Event().wait(0.01)
+        with lock:
+            running -= 1
+
+    mbta.fan_out([call] * 8, max_concurrency=3)
+
+    assert 1 < most_running <= 3
+
+
+def test_fan_out_raises_the_first_error():
+    def fail(message):
+        raise ValueError(message)
+
+    with pytest.raises(ValueError, match="first"):
+        mbta.fan_out(
+            [lambda: 1, lambda: fail("first"), lambda: fail("second")],
+            max_concurrency=3,
+        )
+
+
+def test_fan_out_carries_the_context_over():
+    """Ensure that calls see the caller's cache_only mode and timings."""
+
+    def call():
+        with timing.span("mbta.send"):
+            return mbta.cache_only.get()
+
+    token = mbta.cache_only.set(True)
+    try:
+        with timing.collect() as timings:
+            results = mbta.fan_out([call, call], max_concurrency=2)
+    finally:
+        mbta.cache_only.reset(token)
+
+    assert results == [True, True]
+    assert len(timings.spans) == 2
@@ -0,0 +1,108 @@
+import pytest
+
+from gbpt_api.network.graph import SubwayGraph, catalogue_version
+
+
+def stations(*ids: str) -> list[dict]:
+    return [{"id": id, "name": id.removeprefix("place-")} for id in ids]
+
+
+SEQUENCES = [
+    ("Red", stations("place-harsq", "place-pktrm", "place-dwnxg")),
+    ("Red", stations("place-dwnxg", "place-pktrm", "place-harsq")),
+    ("Green-B", stations("place-kencl", "place-pktrm", "place-gover")),
+    ("Orange", stations("place-dwnxg", "place-state", "place-haecl")),
+    ("Blue", stations("place-state", "place-gover", "place-aqucl")),
+    ("Mattapan", stations("place-asmnl", "place-matt")),
+]
+
+
+@pytest.fixture
+def graph() -> SubwayGraph:
+    return SubwayGraph(SEQUENCES)
+
+
+def test_path_on_a_single_line(graph):
+    """Ensure that a trip along one line has no transfers."""
+    path = graph.path("place-harsq", "place-dwnxg")
+
+    assert (path.stops, path.transfers) == (2, 0)
+    assert path.legs == [
+        {
+            "line": "Red",
+            "stops": stations("place-harsq", "place-pktrm", "place-dwnxg"),
+        }
+    ]
+
+
+def test_path_transfers_at_shared_stations(graph):
+    """
+    Ensure that lines are joined at the stations they share and changing
+    lines counts as a transfer.
+    """
+    path = graph.path("place-harsq", "place-gover")
+
+    assert (path.stops, path.transfers) == (2, 1)
+    assert [leg["line"] for leg in path.legs] == ["Red", "Green-B"]
+    assert path.legs[1]["stops"][0]["id"] == "place-pktrm"
+
+
+def test_path_prefers_fewer_transfers_between_equally_long_paths():
+    """
+    Ensure that among paths with as many stops, the one with the fewest
+    transfers is picked.
+    """
+    graph = SubwayGraph(
+        [
+            ("A", stations("one", "two")),
+            ("B", stations("two", "three")),
+            ("C", stations("one", "four", "three")),
+        ]
+    )
+
+    path = graph.path("one", "three")
+
+    assert (path.stops, path.transfers) == (2, 0)
+    assert [leg["line"] for leg in path.legs] == ["C"]
+
+
+def test_path_to_the_same_station(graph):
+    path = graph.path("place-pktrm", "place-pktrm")
+
+    assert (path.stops, path.transfers, path.legs) == (0, 0, [])
+
+
+def test_path_between_disconnected_stations(graph):
+    assert graph.path("place-harsq", "place-matt") is None
+
+
+def test_path_unknown_station(graph):
+    with pytest.raises(KeyError):
+        graph.path("place-harsq", "place-nowhere")
+
+
+def test_path_reuses_the_search_from_an_origin(graph):
+    """Ensure that trips from an origin already searched are lookups."""
+    graph.path("place-harsq", "place-gover")
+    tree = graph._trees[graph._station_index["place-harsq"]]
+
+    graph.path("place-harsq", "place-haecl")
+
+    assert graph._trees[graph._station_index["place-harsq"]] is tree
+
+
+def test_catalogue_version_only_changes_with_the_network():
+    """
+    Ensure that the version ignores the ordering of lines but changes
+    when the stations, or their names, change.
+    """
+    reordered = list(reversed(SEQUENCES))
+    renamed = [
+        (line, [{**station, "name": "renamed"} for station in stops])
+        for line, stops in SEQUENCES
+    ]
+    extended = SEQUENCES + [("Red", stations("place-harsq", "place-alfcl"))]
+
+    assert catalogue_version(reordered) == catalogue_version(SEQUENCES)
+    assert catalogue_version(renamed) != catalogue_version(SEQUENCES)
+    assert catalogue_version(extended) != catalogue_version(SEQUENCES)